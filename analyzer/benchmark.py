@@ -0,0 +1,90 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from analyzer import detectors
+from analyzer import frame_source
+from analyzer.constants import DECODE_SCALES, ExtractionType, Registration
+
+# boundaries which are at most this many frames apart are counted as the same cut
+BOUNDARY_TOLERANCE = 1
+
+REGISTRATIONS = [registration.value for registration in Registration]
+
+
+def decode_scale(project, extraction_type, threshold, limit=None, scales=DECODE_SCALES):
+	"""Detects the shots with the frames decoded at every scale and compares the boundaries with the boundaries of
+	the first scale, the full resolution decode by default."""
+	runs = [(scale, frame_source.create(project, limit, decode_scale=scale), detectors.detector(extraction_type))
+	        for scale in scales]
+
+	return compare("scale", runs, threshold, project)
+
+
+def registration(project, threshold, limit=None, registrations=REGISTRATIONS):
+	"""Detects the shots with edgeim and every registration and compares the boundaries with the boundaries of the
+	first registration, the full ECC registration by default."""
+	runs = [(method, frame_source.create(project, limit), detectors.detector(ExtractionType.edgeim.value, method))
+	        for method in registrations]
+
+	return compare("registration", runs, threshold, project)
+
+
+def compare(name, runs, threshold, project):
+	"""Time, shots and the accuracy of the boundaries for runs of (value, source, detector). The first run is the
+	reference, deviation is the mean absolute difference of the shot change ratio to the reference."""
+	results = []
+	reference = None
+	reference_sequence = None
+	for value, source, (calculate_sequence, extract_shots) in runs:
+		start = time.time()
+		sequence = calculate_sequence(source)
+		seconds = time.time() - start
+
+		boundaries = shot_boundaries(extract_shots(sequence, source.start_index, threshold, project))
+		reference = boundaries if reference is None else reference
+		reference_sequence = sequence if reference_sequence is None else reference_sequence
+		precision, recall = boundary_accuracy(boundaries, reference)
+		deviation = np.abs(np.subtract(sequence, reference_sequence)).mean() if sequence else 0.0
+
+		results.append(OrderedDict([
+			(name, value),
+			("seconds", round(seconds, 3)),
+			("fps", round((len(sequence) + 1) / seconds, 1) if seconds else None),
+			("shots", len(boundaries) + 1),
+			("precision", round(precision, 4)),
+			("recall", round(recall, 4)),
+			("deviation", round(float(deviation), 4)),
+		]))
+
+	return results
+
+
+def shot_boundaries(shots):
+	"""The first frame of every shot but the first one."""
+	return [shot.start_index for shot in shots[1:]]
+
+
+def boundary_accuracy(boundaries, reference, tolerance=BOUNDARY_TOLERANCE):
+	"""Precision and recall of the boundaries, every reference boundary can be matched once."""
+	if not boundaries or not reference:
+		return float(boundaries == reference), float(boundaries == reference)
+
+	unmatched = sorted(reference)
+	matches = 0
+	for boundary in sorted(boundaries):
+		match = next((candidate for candidate in unmatched if abs(candidate - boundary) <= tolerance), None)
+		if match is not None:
+			unmatched.remove(match)
+			matches += 1
+
+	return matches / len(boundaries), matches / len(reference)
+
+
+def print_table(results):
+	columns = list(results[0].keys()) if results else []
+
+	print("\t".join(columns))
+	for result in results:
+		print("\t".join(str(result[column]) for column in columns))
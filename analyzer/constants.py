@@ -7,9 +7,38 @@ class ExtractionType(Enum):
 	simpleHistogram = "simpleHistogram"
 	edge = "edge"
 	edgeim = "edgeim"
+	hybrid = "hybrid"
+	pixel = "pixel"
 
 
 @unique
 class CharactersAlgorithm(Enum):
 	dtw = "dtw"
 	nw = "nw"
+
+
+@unique
+class FrameFormat(Enum):
+	jpg = "jpg"
+	npy = "npy"
+
+
+@unique
+class DistanceMetric(Enum):
+	euclidean = "euclidean"
+	manhattan = "manhattan"
+	chebyshev = "chebyshev"
+	chisqr = "chisqr"
+
+
+@unique
+class Registration(Enum):
+	ecc = "ecc"
+	phase = "phase"
+	pyramid = "pyramid"
+
+
+FRAME_RATE = 25
+FRAME_WIDTH = 512
+# jpg frames can be decoded at 1/2, 1/4 or 1/8 of their size by skipping parts of the inverse DCT
+DECODE_SCALES = [1, 2, 4, 8]
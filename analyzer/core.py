@@ -8,20 +8,29 @@ from pprint import pprint
 import click
 
 from analyzer import __version__
+from analyzer import benchmark as benchmarks
 from analyzer import chapters_parser
 from analyzer import cinemetrics_ripper
+from analyzer import detectors
 from analyzer import dtw_merger
 from analyzer import edge_detection
+from analyzer import ensemble as ensembles
+from analyzer import frame_store
+from analyzer import hybrid_detection
 from analyzer import image_colors
 from analyzer import label_detection
 from analyzer import needleman_wunsch
 from analyzer import path_utils
+from analyzer import plot
+from analyzer import prefetch
 from analyzer import script_parser
 from analyzer import shot_detection
 from analyzer import splitter
 from analyzer import subtitles_parser
+from analyzer import sweep
 
-from analyzer.constants import ExtractionType, CharactersAlgorithm
+from analyzer.constants import ExtractionType, CharactersAlgorithm, DistanceMetric, FrameFormat, Registration, \
+	DECODE_SCALES
 from analyzer.chapters_parser import Chapter
 from analyzer.csv_export import export_subtitles, export_script
 from analyzer.database import Database
@@ -66,13 +75,37 @@ def cli(ctx, project, verbose, version):
 @cli.command()
 @click.option('-s', '--src', type=click.Path(), required=False,
               help="The path to the video source file")
+@click.option('-f', '--format', type=click.Choice(FrameFormat.__members__), default=FrameFormat.jpg.value,
+              help="Store the frames as <jpg> files under DATA_DIR/<project>/frames or as memory mappable <npy> "
+                   "chunks under DATA_DIR/<project>/frame_store. Default is jpg.")
+@click.option('-j', '--jobs', type=int, default=1,
+              help="Splits the movie into the given number of time ranges, which are extracted by parallel ffmpeg "
+                   "processes. Only applies to the jpg format. Default is 1.")
+@click.option('-pw', '--proxy-width', type=int, required=False,
+              help="Additionally writes frames with the given width (e.g. 128) to DATA_DIR/<project>/proxy_frames "
+                   "from the same decode. Shot detection uses these frames, keyframes are taken from the full "
+                   "resolution frames. Only applies to the jpg format.")
+@click.option('-q', '--quality', type=click.IntRange(2, 31), default=splitter.JPEG_QUALITY,
+              help="The quantizer of the jpg frames from 2 (best quality, largest files) to 31. Default is {}."
+              .format(splitter.JPEG_QUALITY))
 @click.pass_context
-def split(ctx, src):
+def split(ctx, src, format, jobs, proxy_width, quality):
 	"""Splits movies into frames."""
 	project = ctx.obj[PROJECT_KEY]
-	dest = project.folder_path(Project.Folder.frames)
 
-	splitter.split(src, dest)
+	store_dest = project.folder_path(Project.Folder.frame_store)
+	dest = project.folder_path(Project.Folder.frames)
+	proxy_dest = project.folder_path(Project.Folder.proxy_frames)
+
+	# a frame store is preferred over the jpg frames, the frames of the other format are removed after the split, so
+	# only the frames of the last split are used
+	if format == FrameFormat.npy.value:
+		splitter.split_to_store(src, store_dest)
+		path_utils.delete_files_in_folder(dest)
+		path_utils.delete_files_in_folder(proxy_dest)
+	else:
+		splitter.split(src, dest, jobs, proxy_dest, proxy_width, quality)
+		frame_store.delete(store_dest)
 
 
 @cli.command(name='subtitles')
@@ -174,22 +207,82 @@ def characters(ctx, subtitles_path, movie_script, algorithm, partial):
 @click.option("-t", "--threshold", type=float,
               help="Specify the threshold for which shots should be accepted.")
 @click.option("-e", "--extraction-type", is_flag=False, type=click.Choice(ExtractionType.__members__),
-              help="specify the extraction type, currently specified are <simpleHistoram, edge, "
-                   "edgeim>.\nsimpleHistram works with color historams,\nedge uses canny edge detection.\n edgeim "
-                   "uses canny edge detection with image registration.")
+              help="specify the extraction type, currently specified are <simpleHistoram, edge, edgeim, hybrid, "
+                   "pixel>.\nsimpleHistram works with color historams,\nedge uses canny edge detection.\n edgeim uses "
+                   "canny edge detection with image registration.\nhybrid compares the edges only of the frames whose "
+                   "histogram distance is above --candidate-threshold.\npixel compares tiny grayscale versions of the "
+                   "frames, a fast first pass.")
 @click.option("-p", '--frames-path', type=click.Path(), required=False,
               help="Specify the frames path. Currenlty only works for shots processing, not for copying of keyframes "
                    "etc.")
+@click.option("-fv", "--from-video", type=click.Path(exists=True), required=False,
+              help="Decodes the frames for shot detection directly from the given video file instead of reading them "
+                   "from DATA_DIR/<project>/frames. No frames are written to disk.")
 @click.option("-f", "--from-file", is_flag=True,
               help="This option uses the locally stored shots.json. This way one can run color detection at some "
                    "other point in time. Very useful")
 @click.option("-ls", "--local-sequence", is_flag=True,
               help="Use this if you like to run shot detection on pre calculated shot change ratio. The file is read "
                    "from DATA_DIR/<project>/shot-change-ratio.json")
+@click.option("-sf", "--store-features", is_flag=True,
+              help="Stores the raw per-frame features (histogram counts or edge counts) of the detection under "
+                   "DATA_DIR/<project>/features, so the sequence can be recalculated with --from-features.")
+@click.option("-ff", "--from-features", is_flag=True,
+              help="Calculates the shot change ratio from the stored features of the extraction type instead of "
+                   "decoding the frames again.")
+@click.option("-m", "--metric", type=click.Choice(DistanceMetric.__members__), required=False,
+              help="The histogram distance used with --from-features. Default is euclidean.")
+@click.option("-b", "--bins", type=int, nargs=3, required=False,
+              help="Merges the stored histogram bins into the given number of bins per channel, used with "
+                   "--from-features. e.g. --bins 4 4 4")
+@click.option("-sw", "--sweep", "sweep_range", type=float, nargs=3, required=False,
+              help="Evaluates the thresholds from START to STOP with STEP on the stored shot change ratio instead of "
+                   "detecting shots. Writes the shot count, average and median shot length per threshold to "
+                   "DATA_DIR/<project>/threshold_sweep.json. e.g. --sweep 0.1 1.0 0.05")
+@click.option("-so", "--sweep-output", type=click.Path(), required=False,
+              help="Writes the sweep results to the given path instead, as csv if the path ends with .csv.")
+@click.option("-r", "--reference", type=click.Path(exists=True), required=False,
+              help="A list of the frames which start a new shot (json list, shots.json or one frame per line). The "
+                   "sweep adds the precision and recall of the detected boundaries.")
+@click.option("-st", "--stride", type=int, required=False,
+              help="Compares only every n-th frame first and all frames only where these comparisons differ, "
+                   "which skips most of the frames within shots. Only for the histogram extraction types. e.g. "
+                   "--stride 8")
+@click.option("-sb", "--stride-bound", type=float, required=False,
+              help="The distance of two frames compared with --stride above which all frames in between are "
+                   "compared. Default is half the threshold.")
+@click.option("-rg", "--registration", type=click.Choice(Registration.__members__), required=False,
+              help="The image registration of edgeim and hybrid. ecc is the exact but slow default, phase uses phase "
+                   "correlation and pyramid runs ECC from a small pyramid level up. phase and pyramid skip pairs which "
+                   "are nearly equal or clearly different.")
+@click.option("-ct", "--candidate-threshold", type=float, required=False,
+              help="The histogram distance above which hybrid compares the edges of two frames, all other pairs "
+                   "are no cut. Default is {}.".format(hybrid_detection.CANDIDATE_DISTANCE))
+@click.option("-gr", "--gradual", type=float, required=False,
+              help="Detects dissolves, fades and wipes with a twin comparison on the stored histogram features. The "
+                   "value is the lower threshold for the distance of consecutive frames, e.g. --gradual 0.06. Needs "
+                   "the features of --store-features or --from-features.")
+@click.option("-w", "--workers", type=int, default=1,
+              help="Calculates the shot change ratio in the given number of processes. The frames are split into "
+                   "consecutive segments, the result is the same as with a single process. Default is 1.")
+@click.option("-pf", "--prefetch", "prefetch_depth", type=int, default=prefetch.DEPTH,
+              help="The number of jpg frames which are decoded ahead of the detection, the slices and the color "
+                   "clustering. Default is {}.".format(prefetch.DEPTH))
+@click.option("-pt", "--prefetch-threads", type=int, default=prefetch.THREADS,
+              help="The number of threads decoding the prefetched frames. Default is {}.".format(prefetch.THREADS))
+@click.option("-ds", "--decode-scale", type=click.Choice([str(scale) for scale in DECODE_SCALES]), default="1",
+              help="Decodes the jpg frames for the detection at 1/2, 1/4 or 1/8 of their size, which skips most of "
+                   "the decoding work. Videos are scaled down by ffmpeg instead. Default is 1.")
+@click.option("--plots", is_flag=True, default=False,
+              help="Renders the plots of the detection into DATA_DIR/<project>/plots. The series are downsampled "
+                   "and drawn by a background process, the detection doesn't wait for them.")
 @click.option("-c", "--color", type=int, required=False,
               help="Runs the color clustering to find the main colors. You can specify the number of clusters.")
 @click.option("-k", "--keyframes", is_flag=True,
               help="Copies the keyframes of the detected shots into DATA_DIR/<project>/keyframes")
+@click.option("--src", type=click.Path(exists=True), required=False,
+              help="Extracts the keyframes directly from the given video file by seeking to each keyframe. The "
+                   "frames don't need to be split beforehand. Use together with --keyframes.")
 @click.option("-kt", "--keyframe-thumbnails", is_flag=True,
               help="Copies and scales down the keyframes of the detected shots into "
                    "DATA_DIR/<project>/keyframes_thumbnails")
@@ -205,22 +298,43 @@ def characters(ctx, subtitles_path, movie_script, algorithm, partial):
               help="Creates spatio temporal slices from the frames within each shot. Is stored under "
                    "DATA_DIR/<project>/spatio_temporal_slices.")
 @click.pass_context
-def shots_parse(ctx, threshold, extraction_type, frames_path, from_file, local_sequence, color, keyframes,
-                keyframe_thumbnails, keyframe_montage, label, limit, slices):
+def shots_parse(ctx, threshold, extraction_type, frames_path, from_video, from_file, local_sequence, store_features,
+                from_features, metric, bins, sweep_range, sweep_output, reference, stride, stride_bound, registration,
+                candidate_threshold, gradual, workers, prefetch_depth, prefetch_threads, decode_scale, plots, color,
+                keyframes, src, keyframe_thumbnails, keyframe_montage, label, limit, slices):
 	"""Shot detection and feature extraction."""
 
 	project = ctx.obj[PROJECT_KEY]
+	prefetch.configure(prefetch_depth, prefetch_threads)
+	plot.configure(plots)
+
+	if sweep_range:
+		extraction_type = extraction_type or ExtractionType.histogram.value
+		results = sweep.run(project, extraction_type, sweep_range, limit, from_video, reference, sweep_output)
+		benchmarks.print_table(results)
+		return
 
 	if from_file:
 		shots = Shot.from_dicts(project.read(Project.File.shots))
 	else:
+		threshold = detectors.default_threshold(extraction_type, threshold)
+
 		if extraction_type == ExtractionType.edge.value or extraction_type == ExtractionType.edgeim.value:
-			threshold = threshold if threshold is not None else 1000
-			shots = edge_detection.edge_detect(project, threshold,
-			                                   limit, extraction_type == ExtractionType.edgeim.value, local_sequence)
+			shots = edge_detection.edge_detect(project, threshold, limit=limit,
+			                                   image_registration=extraction_type == ExtractionType.edgeim.value,
+			                                   local_sequence=local_sequence, video=from_video,
+			                                   store_features=store_features, from_features=from_features,
+			                                   workers=workers, decode_scale=int(decode_scale), registration=registration)
+		elif extraction_type == ExtractionType.hybrid.value:
+			shots = hybrid_detection.detect(project, threshold, limit=limit, local_sequence=local_sequence,
+			                                video=from_video, workers=workers, decode_scale=int(decode_scale),
+			                                candidate_distance=candidate_threshold, registration=registration)
 		else:
-			threshold = threshold if threshold is not None else 0.4
-			shots = shot_detection.detect(project, threshold, limit, local_sequence, extraction_type)
+			shots = shot_detection.detect(project, threshold, limit=limit, local_sequence=local_sequence,
+			                              type=extraction_type, video=from_video, store_features=store_features,
+			                              from_features=from_features, metric=metric, bins=bins, workers=workers,
+			                              decode_scale=int(decode_scale), stride=stride, stride_bound=stride_bound,
+			                              gradual=gradual)
 
 		ctx.obj[VERBOSE_KEY] and pprint(shots)
 
@@ -233,7 +347,10 @@ def shots_parse(ctx, threshold, extraction_type, frames_path, from_file, local_s
 		path_utils.delete_files_in_folder(path)
 		path_utils.create_directory(path)
 
-		shot_detection.copy_keyframes(project, shots)
+		if src:
+			shot_detection.extract_keyframes(project, shots, src)
+		else:
+			shot_detection.copy_keyframes(project, shots)
 
 	if keyframe_thumbnails:
 		path = project.folder_path(project.Folder.keyframe_thumbnails)
@@ -260,6 +377,73 @@ def shots_parse(ctx, threshold, extraction_type, frames_path, from_file, local_s
 	ctx.obj[SHOTS_KEY] = shots
 
 
+@cli.command()
+@click.option("-ds", "--decode-scale", is_flag=True,
+              help="Runs the shot detection with every decode scale and compares the shots with the shots of the "
+                   "full resolution frames.")
+@click.option("-rg", "--registration", is_flag=True,
+              help="Runs edgeim with every image registration and compares the shots with the shots of the ECC "
+                   "registration.")
+@click.option("-t", "--threshold", type=float,
+              help="Specify the threshold for which shots should be accepted.")
+@click.option("-e", "--extraction-type", is_flag=False, type=click.Choice(ExtractionType.__members__),
+              help="The extraction type of the detection. Default is histogram.")
+@click.option("-lt", "--limit", is_flag=False, nargs=2, required=False,
+              help="Limits the benchmark to the given frames. e.g. --limit 100 2000")
+@click.pass_context
+def benchmark(ctx, decode_scale, registration, threshold, extraction_type, limit):
+	"""Speed and accuracy of detection options."""
+
+	project = ctx.obj[PROJECT_KEY]
+	extraction_type = extraction_type or ExtractionType.histogram.value
+	threshold = detectors.default_threshold(extraction_type, threshold)
+
+	if decode_scale:
+		results = benchmarks.decode_scale(project, extraction_type, threshold, limit)
+		benchmarks.print_table(results)
+
+	if registration:
+		results = benchmarks.registration(project, threshold, limit)
+		benchmarks.print_table(results)
+
+
+@cli.command()
+@click.option("-d", "--detector", "detectors", type=(click.Choice(ensembles.EXTRACTION_TYPES), float, float),
+              multiple=True, required=True, metavar="TYPE THRESHOLD WEIGHT",
+              help="An extraction type ({}) with its threshold and the weight of its vote. Can be given several "
+                   "times, all detectors share one decode of the frames. e.g. -d histogram 0.4 1 -d pixel 0.1 "
+                   "1".format(", ".join(ensembles.EXTRACTION_TYPES)))
+@click.option("-fu", "--fuse", type=float, required=False,
+              help="Writes the weighted share of the detectors which start a shot at a frame to "
+                   "DATA_DIR/<project>/ensemble_score.json and the shots starting at frames with at least the given "
+                   "share to shots.json. e.g. --fuse 0.5")
+@click.option("-rg", "--registration", type=click.Choice(Registration.__members__), required=False,
+              help="The image registration of edgeim.")
+@click.option("-fv", "--from-video", type=click.Path(exists=True), required=False,
+              help="Decodes the frames directly from the given video file instead of reading them from "
+                   "DATA_DIR/<project>/frames.")
+@click.option("-w", "--workers", type=int, default=1,
+              help="Calculates the sequences in the given number of processes. Default is 1.")
+@click.option("-ds", "--decode-scale", type=click.Choice([str(scale) for scale in DECODE_SCALES]), default="1",
+              help="Decodes the jpg frames at 1/2, 1/4 or 1/8 of their size. Default is 1.")
+@click.option("-lt", "--limit", is_flag=False, nargs=2, required=False,
+              help="Limits the detection to the given frames. e.g. --limit 100 2000")
+@click.pass_context
+def ensemble(ctx, detectors, fuse, registration, from_video, workers, decode_scale, limit):
+	"""Several shot detections from a single decode of the frames."""
+
+	project = ctx.obj[PROJECT_KEY]
+
+	results, shots = ensembles.run(project, detectors, fuse, limit, from_video, workers, int(decode_scale),
+	                               registration)
+	benchmarks.print_table(results)
+
+	if shots:
+		ctx.obj[VERBOSE_KEY] and pprint(shots)
+		project.write(objects_as_dict(shots), Project.File.shots)
+		ctx.obj[SHOTS_KEY] = shots
+
+
 @cli.command(name='label')
 @click.option('-p', '--path', type=click.Path(), required=True,
               help="The path to the image file")
@@ -0,0 +1,52 @@
+from analyzer import edge_detection
+from analyzer import features
+from analyzer import hybrid_detection
+from analyzer import shot_detection
+from analyzer.constants import ExtractionType
+
+# the threshold of the shot extraction of every extraction type if none is given
+DEFAULT_THRESHOLDS = {
+	ExtractionType.histogram.value: 0.4,
+	ExtractionType.simpleHistogram.value: 0.4,
+	ExtractionType.edge.value: 1000,
+	ExtractionType.edgeim.value: 1000,
+	ExtractionType.hybrid.value: 0.5,
+	ExtractionType.pixel.value: 0.1,
+}
+
+# extraction types whose shots start where the edge change ratio rises, the others use the second derivative
+EDGE_TYPES = (ExtractionType.edge.value, ExtractionType.edgeim.value, ExtractionType.hybrid.value)
+
+
+def default_threshold(extraction_type, threshold=None):
+	"""The given threshold or the default of the extraction type, histogram if none is given."""
+	if threshold is not None:
+		return threshold
+
+	return DEFAULT_THRESHOLDS[extraction_type or ExtractionType.histogram.value]
+
+
+def feature(extraction_type, registration=None):
+	"""The feature which compares consecutive frames for an extraction type, hybrid has none."""
+	if extraction_type in (ExtractionType.edge.value, ExtractionType.edgeim.value):
+		return edge_detection.edge_feature(extraction_type == ExtractionType.edgeim.value, registration)
+
+	return shot_detection.detection_feature(extraction_type)
+
+
+def shot_extraction(extraction_type):
+	"""The function which extracts the shots from the sequence of an extraction type."""
+	if extraction_type in EDGE_TYPES:
+		return edge_detection.extract_shots
+
+	return shot_detection.extract_shots
+
+
+def detector(extraction_type, registration=None):
+	"""The sequence calculation and the shot extraction of an extraction type."""
+	if extraction_type == ExtractionType.hybrid.value:
+		return (lambda source: hybrid_detection.calculate_sequence(source, registration=registration),
+		        shot_extraction(extraction_type))
+
+	return (lambda source: features.calculate_sequence(source, feature(extraction_type, registration)),
+	        shot_extraction(extraction_type))
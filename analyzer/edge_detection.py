@@ -1,31 +1,42 @@
-import glob
-
 from os.path import join
 from pprint import pprint
 
 import cv2
 import numpy as np
-from tqdm import tqdm
 from matplotlib import pyplot as plt
 
+from analyzer import feature_store
+from analyzer import features
+from analyzer import frame_source
 from analyzer import plot
+from analyzer.constants import Registration
+from analyzer.edge_engine import EdgeEngine, create_clahe, disk, in_out_counts
+from analyzer.feature_store import FeatureStore
+from analyzer.features import Feature
 from analyzer.project import Project
+from analyzer.sequence_store import SequenceStore
 from analyzer.shot_detection import Shot
-from analyzer.utils import window, extract_index, slice_paths, derivative, crop_image
+from analyzer.utils import derivative, crop_image
+
 
+# fast registrations skip pairs whose 64px wide thumbnails differ less than the first or more than the second bound,
+# the frames are aligned already or show different content
+REGISTRATION_THUMBNAIL_WIDTH = 64
+REGISTRATION_SKIP_BOUNDS = (1.0, 48.0)
 
-clahe = cv2.createCLAHE(clipLimit=1.0, tileGridSize=(16, 16))
+# the pyramid ECC starts at the first level narrower than twice this width, with few iterations per level
+PYRAMID_MIN_WIDTH = 64
+PYRAMID_CRITERIA = (cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 50, 1e-4)
 
+hanning_windows = {}
 
-def load_image(path):
-	image = cv2.imread(path)
-	gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
-	return gray
+def convert_image(image):
+	return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
 
 
-def calculate_edges(image):
-	con = clahe.apply(image)
+def calculate_edges(image, equalizer=None):
+	con = (equalizer or create_clahe()).apply(image)
 	blurred = cv2.GaussianBlur(con, (3, 3), 0)
 	edges = cv2.Canny(blurred, 40, 120)
 
@@ -45,21 +56,8 @@ def calculate_edges(image):
 
 
 def dilate_edges(edge_image, radius=5):
-	height, width = edge_image.shape
-
-	# convert to list due to faster accessing of elements
-	image = list(edge_image)
-	dilated_image = np.zeros((height, width), dtype=np.uint8)
-
-	for i in range(height):
-		for j in range(width):
-			val = image[i][j]
-			if val:
-				cv2.circle(dilated_image, (j, i), radius, 255, -1)
-			# cv2.imshow("Dilated Edges", np.hstack([edge_image, dilated_image]))
-			# cv2.waitKey(1)
-
-	return dilated_image
+	"""Draws a filled circle of the radius around every edge pixel."""
+	return cv2.dilate(edge_image, disk(radius))
 
 
 def count_in_out_edges(i0, i1):
@@ -70,7 +68,10 @@ def count_in_out_edges(i0, i1):
 	return counter
 
 
-def calculate_image_registration(project, im1, im2, i):
+def calculate_image_registration(im1, im2, registration=Registration.ecc.value):
+	if registration != Registration.ecc.value:
+		return fast_image_registration(im1, im2, registration)
+
 	# Find size of image1
 	sz = im1.shape
 
@@ -107,19 +108,6 @@ def calculate_image_registration(project, im1, im2, i):
 		# Use warpAffine for Translation, Euclidean and Affine
 		aligned = cv2.warpAffine(im1, warp_matrix, (sz[1], sz[0]), flags=cv2.INTER_LINEAR + cv2.WARP_INVERSE_MAP)
 
-	# plots_path = project.folder_path(Project.Folder.plots)
-	# cv2.imwrite(join(plots_path, "{}_im_0.jpg".format(i)), im1)
-	# cv2.imwrite(join(plots_path, "{}_im_1.jpg".format(i)), im2)
-	# cv2.imwrite(join(plots_path, "{}_im_2.jpg".format(i)), aligned)
-
-	# dst0 = cv2.addWeighted(im1, 0.5, im2, 0.5, 0)
-	# dst1 = cv2.addWeighted(aligned, 0.5, im1, 0.5, 0)
-	# dst2 = cv2.addWeighted(aligned, 0.5, im2, 0.5, 0)
-
-	# cv2.imwrite(join(plots_path, "{}_im_dst_01.jpg".format(i)), dst0)
-	# cv2.imwrite(join(plots_path, "{}_im_dst_20.jpg".format(i)), dst1)
-	# cv2.imwrite(join(plots_path, "{}_im_dst2_21.jpg".format(i)), dst2)
-
 	# # Show final results
 	# cv2.imshow("Registration", np.hstack([im1, im2, aligned]))
 	# cv2.waitKey(0)
@@ -127,104 +115,159 @@ def calculate_image_registration(project, im1, im2, i):
 	return im1, im2, crop_image(aligned), crop_image(im2)
 
 
-def edge_detect(project, threshold, limit=None, image_registration=False, local_sequence=False):
-	src = project.folder_path(Project.Folder.frames)
-	image_paths = sorted(glob.glob(src + "/*.jpg"))
+def fast_image_registration(im1, im2, registration):
+	"""Translation of im1 onto im2 by phase correlation or by ECC on an image pyramid. Pairs whose thumbnails are
+	nearly equal or clearly different aren't registered, the registration wouldn't change their outcome."""
+	difference = thumbnail_difference(im1, im2)
+	if difference < REGISTRATION_SKIP_BOUNDS[0] or difference > REGISTRATION_SKIP_BOUNDS[1]:
+		return im1, im2, crop_image(im1), crop_image(im2)
+
+	warp_matrix = phase_registration(im1, im2) if registration == Registration.phase.value \
+		else pyramid_registration(im1, im2)
+	if warp_matrix is None:
+		return im1, im2, crop_image(im1), crop_image(im2)
+
+	sz = im1.shape
+	aligned = cv2.warpAffine(im1, warp_matrix, (sz[1], sz[0]), flags=cv2.INTER_LINEAR + cv2.WARP_INVERSE_MAP)
+
+	return im1, im2, crop_image(aligned), crop_image(im2)
+
+
+def thumbnail_difference(im1, im2):
+	"""Mean absolute difference of small grayscale versions of both frames."""
+	height, width = im1.shape
+	size = (REGISTRATION_THUMBNAIL_WIDTH, max(int(round(height * REGISTRATION_THUMBNAIL_WIDTH / width)), 1))
+
+	thumbnail1 = cv2.resize(im1, size, interpolation=cv2.INTER_AREA)
+	thumbnail2 = cv2.resize(im2, size, interpolation=cv2.INTER_AREA)
+
+	return cv2.norm(thumbnail1, thumbnail2, cv2.NORM_L1) / thumbnail1.size
+
 
-	if limit:
-		image_paths = slice_paths(image_paths, limit)
+def phase_registration(im1, im2):
+	"""Translation warp matrix like the one of findTransformECC from the peak of the phase correlation."""
+	height, width = im1.shape
+	if (height, width) not in hanning_windows:
+		hanning_windows[(height, width)] = cv2.createHanningWindow((width, height), cv2.CV_32F)
+
+	(dx, dy), _ = cv2.phaseCorrelate(np.float32(im2), np.float32(im1), hanning_windows[(height, width)])
+
+	return np.float32([[1, 0, dx], [0, 1, dy]])
+
+
+def pyramid_registration(im1, im2):
+	"""ECC translation starting at the smallest pyramid level, every level starts with the translation of the level
+	below. None if ECC doesn't converge."""
+	levels = [(im1, im2)]
+	while levels[-1][0].shape[1] >= 2 * PYRAMID_MIN_WIDTH:
+		levels.append((cv2.pyrDown(levels[-1][0]), cv2.pyrDown(levels[-1][1])))
+
+	warp_matrix = np.eye(2, 3, dtype=np.float32)
+	for i, (level1, level2) in enumerate(reversed(levels)):
+		if i:
+			warp_matrix[:, 2] *= 2
+
+		try:
+			(cc, warp_matrix) = cv2.findTransformECC(level2, level1, warp_matrix, cv2.MOTION_TRANSLATION,
+			                                         PYRAMID_CRITERIA)
+		except cv2.error:
+			return None
+
+	return warp_matrix
+
+
+def edge_detect(project, threshold, limit=None, image_registration=False, local_sequence=False, video=None,
+                store_features=False, from_features=False, workers=1, decode_scale=1, registration=None):
+	feature = edge_feature(image_registration, registration)
+	source = frame_source.create(project, limit, video, decode_scale)
 
 	if local_sequence:
-		sequence = project.read(Project.File.shot_change_ratio)
+		sequence = SequenceStore.load(project, feature.key(), source.parameters()).read(source)
+		if sequence is None:
+			sequence = project.read(Project.File.shot_change_ratio)
+		start_index = source.start_index
+	elif from_features:
+		arrays = feature_store.require(project, feature.key(), source.parameters())
+		sequence = feature.rescore(arrays).tolist()
+		start_index = int(arrays["startIndex"])
+		sequence and project.write(sequence, Project.File.shot_change_ratio)
 	else:
-		sequence = calculate_sequence(project, image_paths, limit, image_registration)
+		store = FeatureStore(feature, source.start_index, source.parameters()) if store_features else None
+
+		sequences = SequenceStore.load(project, feature.key(), source.parameters())
+		sequence = sequences.calculate(source, feature, store, workers)
 		sequence and project.write(sequence, Project.File.shot_change_ratio)
+		sequences.save()
+		store and store.save(project)
+		start_index = source.start_index
 
-	shots = extract_shots(sequence, image_paths, threshold, project)
+	shots = extract_shots(sequence, start_index, threshold, project)
 
 	return shots
 
 
-def calculate_sequence(project, image_paths, limit, image_registration):
-	sequence = []
-	progress_bar = tqdm(total=len(image_paths), desc="shots detection")
+def calculate_sequence(source, image_registration, store=None, workers=1, registration=None):
+	return features.calculate_sequence(source, edge_feature(image_registration, registration), store, workers)
 
-	for i, (p0, p1) in enumerate(window(image_paths, 2)):
-		file_index = extract_index(p0)
-		image0 = load_image(p0)
-		image1 = load_image(p1)
 
-		if image_registration:
-			image0_orig, image1_orig, image0, image1 = calculate_image_registration(project, image0, image1, file_index)
+def edge_feature(image_registration, registration=None):
+	return RegisteredEdgeFeature(registration) if image_registration else EdgeEngine()
 
-		con0, blurred0, edges0 = calculate_edges(image0)
-		con1, blurred1, edges1 = calculate_edges(image1)
 
-		dilated0 = dilate_edges(edges0)
-		dilated1 = dilate_edges(edges1)
+class RegisteredEdgeFeature(EdgeEngine):
+	"""The edges depend on the registration of both frames, so only the grayscale frame is kept per frame."""
 
-		# plots_path = project.folder_path(Project.Folder.plots)
-		# cv2.imwrite(join(plots_path, "{}_gray_0.jpg".format(file_index)), image0)
-		# cv2.imwrite(join(plots_path, "{}_gray_1.jpg".format(file_index)), image1)
-		#
-		# cv2.imwrite(join(plots_path, "{}_con_0.jpg".format(file_index)), np.hstack([con0]))
-		# cv2.imwrite(join(plots_path, "{}_con_1.jpg".format(file_index)), np.hstack([con1]))
-		#
-		# cv2.imwrite(join(plots_path, "{}_blurred_0.jpg".format(file_index)), np.hstack([blurred0]))
-		# cv2.imwrite(join(plots_path, "{}_blurred_1.jpg".format(file_index)), np.hstack([blurred1]))
-		#
-		# cv2.imwrite(join(plots_path, "{}_edges_0.jpg".format(file_index)), edges0)
-		# cv2.imwrite(join(plots_path, "{}_edges_1.jpg".format(file_index)), edges1)
-		# cv2.imwrite(join(plots_path, "{}_dilated_0.jpg".format(file_index)), dilated0)
-		# cv2.imwrite(join(plots_path, "{}_dilated_1.jpg".format(file_index)), dilated1)
+	comparisons = Feature.comparisons
+	# a registration can take seconds, short segments keep the worker processes equally busy
+	segment_frames = 100
 
-		out_edges = count_in_out_edges(edges0, dilated1)
-		in_edges = count_in_out_edges(edges1, dilated0)
+	def __init__(self, registration=None):
+		EdgeEngine.__init__(self)
+		self.registration = registration or Registration.ecc.value
 
-		edge_count0 = np.count_nonzero(edges0)
-		edge_count1 = np.count_nonzero(edges1)
+	def extract(self, frames):
+		return [convert_image(frame) for frame in frames]
 
-		p_out = out_edges/edge_count0 if edge_count0 else 0
-		p_in = in_edges/edge_count1 if edge_count1 else 0
+	def compare(self, image0, image1):
+		_, _, image0, image1 = calculate_image_registration(image0, image1, self.registration)
 
-		dist = max(p_out, p_in)
+		maps0, maps1 = np.stack(self.edges(image0)), np.stack(self.edges(image1))
+		return in_out_counts(maps0[None], maps1[None])[0]
 
-		sequence.append(dist)
-		progress_bar.update()
+	def key(self):
+		return "edgeim" if self.registration == Registration.ecc.value else "edgeim_{}".format(self.registration)
 
-	progress_bar.close()
-
-	return sequence
-
-
-def extract_shots(distances, image_paths, threshold, project):
-	# pprint(["{}: {}".format(extract_index(path), d) for d, path in zip(distances, image_paths)])
 
+def extract_shots(distances, start_index, threshold, project):
 	distances = derivative(distances)
 
 	# plot.plot("edge_detection_derivative", [distances], project=project, store=True, ylim=(0.0, 1.0), xlim=(0.0, len(distances)))
-	# pprin(["{}: {}".format(extract_index(path), d) for d, path in zip(distances, image_paths)])
 
-	last_shot_index = extract_index(image_paths[0])
-	last_index = len(distances) - 1
 	shots = []
-
 	plot_test = [(0, 0)]
 
-	progress_bar = tqdm(total=len(distances), desc="shots extraction")
-	for i, val in enumerate(distances):
-		if val > threshold or last_index == i:
-			plot_test.append((i, val))
-			image_index = extract_index(image_paths[i])
+	if len(distances):
+		first, candidates, scores, end = boundary_candidates(distances, start_index)
+		boundaries = candidates[scores > threshold].tolist()
 
-			shot = Shot(last_shot_index, image_index, len(shots), int(val))
-			shots.append(shot)
-			last_shot_index = image_index
-		progress_bar.update()
+		start_indices = [first] + boundaries
+		end_indices = boundaries + [end]
+		values = distances[np.array(end_indices) - start_index]
 
-	progress_bar.close()
+		bounds = zip(start_indices, end_indices, values)
+		shots = [Shot(start, end, i, int(value)) for i, (start, end, value) in enumerate(bounds)]
+
+		plot_test += [(index - start_index, value) for index, value in zip(end_indices, values.tolist())]
 
 	x, y = zip(*plot_test)
 	plot.plot("edge_detection", [distances], [(x, y)], project, store=True, ylim=(0.0, 1.0), xlim=(0.0, len(distances)))
 
 	return shots
+
+
+def boundary_candidates(distances, start_index):
+	"""Every frame but the last one ends a shot if the derivative of its distance is above the threshold, the last
+	frame always ends the last shot. Returns the first frame, the candidates, their scores and the last frame."""
+	last_index = len(distances) - 1
+
+	return start_index, start_index + np.arange(last_index), distances[:last_index], start_index + last_index
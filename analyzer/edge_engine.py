@@ -0,0 +1,128 @@
+import cv2
+import numpy as np
+
+from analyzer.features import Feature
+
+BATCH_SIZE = 32
+
+DILATION_RADIUS = 5
+CLAHE_CLIP_LIMIT = 1.0
+CLAHE_TILE_GRID_SIZE = (16, 16)
+CANNY_THRESHOLDS = (40, 120)
+
+
+class EdgeEngine(Feature):
+	"""Canny edges and their dilation for a whole batch of frames, compared with the edges of the next frame.
+
+	CLAHE, blur, Canny and the dilation run once per frame into preallocated buffers, the edge map and the dilated map
+	of a frame are kept for its comparison with the next frame, also across batches. The dilation with a disk shaped
+	kernel covers the same pixels as the filled circles of dilate_edges. The in and out edges of all pairs of a batch
+	are counted with numpy, the counts match count_in_out_edges.
+	"""
+
+	batch_size = BATCH_SIZE
+
+	def __init__(self, radius=DILATION_RADIUS):
+		self.radius = radius
+		self.kernel = disk(radius)
+
+		self.equalizer = None
+		self.buffers = {}
+
+	def __getstate__(self):
+		# CLAHE instances can't be pickled and aren't safe to share, every worker process creates its own CLAHE and
+		# its own buffers on its first frame
+		state = dict(self.__dict__)
+		state.update(equalizer=None, buffers={})
+
+		return state
+
+	def buffer(self, name, shape):
+		"""A reused uint8 array for the intermediate images of a frame."""
+		buffer = self.buffers.get(name)
+		if buffer is None or buffer.shape != shape:
+			buffer = self.buffers[name] = np.empty(shape, dtype=np.uint8)
+
+		return buffer
+
+	def edges(self, image, edges=None, dilated=None):
+		"""Edge map and dilated edge map of a grayscale image, written to edges and dilated if given."""
+		if self.equalizer is None:
+			self.equalizer = create_clahe()
+
+		equalized = self.equalizer.apply(image, self.buffer("equalized", image.shape))
+		blurred = cv2.GaussianBlur(equalized, (3, 3), 0, self.buffer("blurred", image.shape))
+
+		edges = cv2.Canny(blurred, CANNY_THRESHOLDS[0], CANNY_THRESHOLDS[1], edges)
+		dilated = cv2.dilate(edges, self.kernel, dilated)
+
+		return edges, dilated
+
+	def extract(self, frames):
+		"""Edge maps of the frames with shape (frames, 2, height, width), the dilated map second."""
+		height, width = frames[0].shape[:2]
+		maps = np.empty((len(frames), 2, height, width), dtype=np.uint8)
+
+		for i, frame in enumerate(frames):
+			gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, self.buffer("gray", (height, width)))
+			self.edges(gray, maps[i, 0], maps[i, 1])
+
+		return maps
+
+	def compare(self, maps0, maps1):
+		return in_out_counts(maps0[None], maps1[None])[0]
+
+	def comparisons(self, previous, features):
+		counts = in_out_counts(features[:-1], features[1:])
+		if previous is None:
+			return counts
+
+		return np.concatenate([in_out_counts(previous[None], features[:1]), counts])
+
+	def score(self, comparisons):
+		return edge_change_ratios(comparisons)
+
+	def key(self):
+		return "edge"
+
+	def arrays(self, features, comparisons):
+		return {"edgeCounts": np.asarray(comparisons, dtype=np.uint32).reshape((-1, 4))}
+
+	def rescore(self, arrays):
+		return edge_change_ratios(arrays["edgeCounts"])
+
+
+def create_clahe():
+	return cv2.createCLAHE(clipLimit=CLAHE_CLIP_LIMIT, tileGridSize=CLAHE_TILE_GRID_SIZE)
+
+
+def disk(radius):
+	"""The pixels of a filled cv2.circle of the radius, a dilation with it draws such a circle around every pixel."""
+	kernel = np.zeros((2 * radius + 1, 2 * radius + 1), dtype=np.uint8)
+	cv2.circle(kernel, (radius, radius), radius, 1, -1)
+
+	return kernel
+
+
+def in_out_counts(maps0, maps1):
+	"""Exiting and entering edge pixels and the edge pixels of both frames for stacks of edge maps. Exiting edges of
+	the first frame are outside of the dilated edges of the second frame and vice versa."""
+	edges0, dilated0 = maps0[:, 0], maps0[:, 1]
+	edges1, dilated1 = maps1[:, 0], maps1[:, 1]
+
+	out_edges = np.count_nonzero(edges0 & ~dilated1, axis=(1, 2))
+	in_edges = np.count_nonzero(edges1 & ~dilated0, axis=(1, 2))
+
+	counts = [out_edges, in_edges, np.count_nonzero(edges0, axis=(1, 2)), np.count_nonzero(edges1, axis=(1, 2))]
+	return np.stack(counts, axis=1)
+
+
+def edge_change_ratios(counts):
+	"""The edge change ratio max(p_out, p_in) for rows of edge counts, 0 if a frame has no edges."""
+	counts = np.asarray(counts, dtype=np.float64).reshape((-1, 4))
+	out_edges, in_edges, edge_count0, edge_count1 = counts.T
+
+	p_out = np.divide(out_edges, edge_count0, out=np.zeros_like(out_edges), where=edge_count0 != 0)
+	p_in = np.divide(in_edges, edge_count1, out=np.zeros_like(in_edges), where=edge_count1 != 0)
+
+	return np.maximum(p_out, p_in)
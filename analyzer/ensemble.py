@@ -0,0 +1,108 @@
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+from analyzer import detectors as detection
+from analyzer import features
+from analyzer import frame_source
+from analyzer.benchmark import shot_boundaries
+from analyzer.constants import ExtractionType
+from analyzer.features import Feature
+from analyzer.project import Project
+from analyzer.sequence_store import SequenceStore
+from analyzer.shot_detection import Shot
+
+# the extraction types which only compare consecutive frames, so they can share the decoded frames
+EXTRACTION_TYPES = [ExtractionType.histogram.value, ExtractionType.simpleHistogram.value, ExtractionType.edge.value,
+                    ExtractionType.edgeim.value, ExtractionType.pixel.value]
+
+
+class EnsembleFeature(Feature):
+	"""The features of several detectors for the same frames, every batch is decoded once and passed to all of them.
+
+	The features of a batch are a list with the features of every detector, the score of a batch has one column per
+	detector.
+	"""
+
+	def __init__(self, features):
+		self.features = list(features)
+		self.batch_size = max(feature.batch_size for feature in self.features)
+		self.segment_frames = min(feature.segment_frames for feature in self.features)
+
+	def extract(self, frames):
+		return [feature.extract(frames) for feature in self.features]
+
+	def comparisons(self, previous, features):
+		previous = previous if previous is not None else [None] * len(self.features)
+		return [feature.comparisons(*pair) for feature, pair in zip(self.features, zip(previous, features))]
+
+	def score(self, comparisons):
+		scores = [np.asarray(feature.score(c), dtype=np.float64) for feature, c in zip(self.features, comparisons)]
+		return np.stack(scores, axis=1)
+
+	def last(self, features):
+		return [feature.last(f) for feature, f in zip(self.features, features)]
+
+	def key(self):
+		return "+".join(feature.key() for feature in self.features)
+
+
+def run(project, detectors, share=None, limit=None, video=None, workers=1, decode_scale=1, registration=None):
+	"""Runs every detector, given as extraction type, threshold and weight, on a single decode of the frames. The
+	sequence of every detector is kept in the sequence store, so later runs of shots reuse it.
+
+	With a share the weighted votes of the detectors for every frame are written to ensemble_score.json, and the
+	fused shots start at the frames with at least that share of the votes. Returns a row per detector and the fused
+	shots."""
+	source = frame_source.create(project, limit, video, decode_scale)
+	pairs = [(detection.feature(extraction_type, registration), detection.shot_extraction(extraction_type))
+	         for extraction_type, _, _ in detectors]
+
+	start = time.time()
+	rows = features.calculate_sequence(source, EnsembleFeature(feature for feature, _ in pairs), workers=workers)
+	seconds = time.time() - start
+	print("Decoded {} frames once for {} detectors in {:.1f}s".format(len(rows) + 1, len(detectors), seconds))
+
+	sequences = np.asarray(rows, dtype=np.float64).reshape((-1, len(detectors))).T
+	votes = np.zeros(len(rows) + 1)
+
+	results = []
+	for (extraction_type, threshold, weight), (feature, extract_shots), sequence in zip(detectors, pairs, sequences):
+		sequence = sequence.tolist()
+
+		sequence_store = SequenceStore.load(project, feature.key(), source.parameters())
+		sequence_store.insert(source.start_index, sequence)
+		sequence_store.save()
+
+		boundaries = shot_boundaries(extract_shots(sequence, source.start_index, threshold, project))
+		votes[np.asarray(boundaries, dtype=int) - (source.start_index - 1)] += weight
+
+		results.append(OrderedDict([("detector", extraction_type), ("threshold", threshold), ("weight", weight),
+		                            ("shots", len(boundaries) + 1)]))
+
+	if share is None:
+		return results, None
+
+	score = votes / sum(weight for _, _, weight in detectors)
+	project.write(score.tolist(), Project.File.ensemble_score)
+
+	shots = fused_shots(score, source.start_index, share)
+	results.append(OrderedDict([("detector", "fused"), ("threshold", share), ("weight", None), ("shots", len(shots))]))
+
+	return results, shots
+
+
+def fused_shots(score, start_index, share):
+	"""Shots starting at the frames whose share of the votes is at least share, score has one entry per frame."""
+	first = start_index - 1
+	boundaries = (first + np.flatnonzero(score[1:] >= share) + 1).tolist()
+
+	start_indices = [first] + boundaries
+	end_indices = boundaries + [first + len(score) - 1]
+	shares = [None] + score[np.asarray(boundaries, dtype=int) - first].tolist()
+
+	bounds = zip(start_indices, end_indices, shares)
+
+	return [Shot(start_index=start, end_index=end, id=i, relative_diff=diff)
+	        for i, (start, end, diff) in enumerate(bounds)]
@@ -0,0 +1,129 @@
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from os.path import join
+
+import numpy as np
+
+from analyzer.project import Project
+
+# rows of a spilled array which are converted at once when it has to be widened
+CHUNK_ROWS = 4096
+
+
+class FeatureStore(object):
+	"""Collects the raw data of a feature while the sequence is calculated and saves it compressed as
+	DATA_DIR/<project>/features/<key>.npz. Every batch is written to a temporary file as it arrives, the arrays are
+	memory maps of these files, so neither the batches nor a concatenated copy are kept in memory.
+
+	The parameters of the source are saved with the arrays, stored features of other frames aren't loaded."""
+
+	def __init__(self, feature, start_index, parameters=None):
+		self.key = feature.key()
+		self.start_index = start_index
+		self.parameters = parameters
+		self.spills = OrderedDict()
+
+	def append(self, arrays):
+		for name, array in arrays.items():
+			if name not in self.spills:
+				self.spills[name] = Spill()
+
+			self.spills[name].write(array)
+
+	def extend(self, arrays, comparison_count, overlapping):
+		"""Appends the arrays of a segment calculated by another process. If the segment starts with the last frame of
+		the previous segment, the first row of the per frame arrays, which have one row more than comparisons, is
+		already stored."""
+		trimmed = OrderedDict()
+		for name, array in arrays.items():
+			overlaps = overlapping and len(array) == comparison_count + 1
+			trimmed[name] = array[1:] if overlaps else array
+
+		self.append(trimmed)
+
+	def concatenated(self):
+		return {name: spill.array() for name, spill in self.spills.items()}
+
+	def save(self, project):
+		# savez writes the memory maps in chunks
+		np.savez_compressed(path(project, self.key), startIndex=self.start_index, parameters=json.dumps(self.parameters),
+		                    **self.concatenated())
+
+
+class Spill(object):
+	"""The rows of one array appended batch by batch to a temporary file. Counts are written as uint16 while they
+	fit, which halves the size of the histograms of 512px frames, and widened once if a later batch doesn't fit."""
+
+	def __init__(self):
+		self.file = tempfile.TemporaryFile()
+		self.dtype = None
+		self.row_shape = None
+		self.rows = 0
+
+	def write(self, array):
+		array = np.asarray(array)
+		dtype = compact_dtype(array)
+
+		if self.dtype is None:
+			self.dtype, self.row_shape = dtype, array.shape[1:]
+		elif dtype != self.dtype and self.dtype == np.uint16:
+			self.widen(dtype)
+
+		self.file.write(np.ascontiguousarray(array, dtype=self.dtype).tobytes())
+		self.rows += len(array)
+
+	def widen(self, dtype):
+		rows = self.array()
+		widened = tempfile.TemporaryFile()
+
+		for start in range(0, self.rows, CHUNK_ROWS):
+			widened.write(rows[start:start + CHUNK_ROWS].astype(dtype).tobytes())
+
+		del rows
+		self.file.close()
+		self.file, self.dtype = widened, np.dtype(dtype)
+
+	def array(self):
+		if not self.rows:
+			return np.zeros((0,) + self.row_shape, dtype=self.dtype)
+
+		self.file.flush()
+		return np.memmap(self.file, dtype=self.dtype, mode="r", shape=(self.rows,) + self.row_shape)
+
+
+def compact_dtype(array):
+	"""uint16 for uint32 counts which fit into it, the dtype of the array otherwise."""
+	if array.dtype == np.uint32 and (array.size == 0 or array.max() <= np.iinfo(np.uint16).max):
+		return np.dtype(np.uint16)
+
+	return array.dtype
+
+
+def path(project, key):
+	return join(project.folder_path(Project.Folder.features), "{}.npz".format(key))
+
+
+def load(project, key, parameters=None):
+	"""The stored arrays of the feature. None if there are none, or if parameters are given and the arrays were
+	calculated from frames with other parameters."""
+	if not os.path.exists(path(project, key)):
+		return None
+
+	with np.load(path(project, key)) as data:
+		stored = json.loads(str(data["parameters"])) if "parameters" in data.files else None
+		if parameters is not None and stored != json.loads(json.dumps(parameters)):
+			return None
+
+		return {name: data[name] for name in data.files if name != "parameters"}
+
+
+def require(project, key, parameters):
+	"""The stored arrays of the feature, which have to be calculated from the frames with the given parameters."""
+	arrays = load(project, key, parameters)
+	if arrays is None:
+		raise Exception("No features of {} are stored for these frames, run the detection with --store-features"
+		                .format(key))
+
+	return arrays
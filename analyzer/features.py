@@ -0,0 +1,192 @@
+import math
+from multiprocessing import Pool
+
+import cv2
+import numpy as np
+from tqdm import tqdm
+
+from analyzer.feature_store import FeatureStore
+from analyzer.utils import batches, window
+
+# more segments than workers keep all workers busy if some segments decode slower than others
+SEGMENTS_PER_WORKER = 4
+# long sources are split into segments of at most this many frames, features can lower it if their pairs are slow
+SEGMENT_FRAMES = 1000
+
+# the second derivative peak test of a boundary depends on the three distances before it, refined intervals are
+# extended until this many distances at their edges are below the bound
+EDGE_DISTANCES = 3
+
+
+class Feature(object):
+	"""A feature which is computed once per frame and compared with the feature of the following frame.
+
+	Subclasses implement extract and either compare or, if a whole batch can be compared at once, comparisons.
+	A comparison is turned into the distance of two frames by score, by default the comparison is the distance.
+	"""
+
+	batch_size = 1
+	segment_frames = SEGMENT_FRAMES
+
+	def extract(self, frames):
+		"""Returns one feature for every BGR frame of the batch."""
+		raise NotImplementedError
+
+	def compare(self, feature0, feature1):
+		raise NotImplementedError
+
+	def comparisons(self, previous, features):
+		"""Compares every feature with its predecessor. previous is the last feature of the batch before or None."""
+		features = list(features) if previous is None else [previous] + list(features)
+		return [self.compare(feature0, feature1) for feature0, feature1 in window(features, 2)]
+
+	def score(self, comparisons):
+		return comparisons
+
+	def last(self, features):
+		"""The feature of the last frame of a batch, it is compared with the first frame of the next batch."""
+		return features[-1]
+
+	def key(self):
+		"""Identifies the feature and the parameters it depends on, used to name stored features."""
+		raise NotImplementedError
+
+	def arrays(self, features, comparisons):
+		"""The raw data of a batch which is kept by a FeatureStore."""
+		return {}
+
+
+def sequence(frames, feature, store=None):
+	"""Yields the number of frames and the distances to their predecessors for every batch."""
+	previous = None
+
+	for batch in batches(frames, feature.batch_size):
+		features = feature.extract(batch)
+		comparisons = feature.comparisons(previous, features)
+
+		if store is not None:
+			store.append(feature.arrays(features, comparisons))
+
+		yield len(batch), feature.score(comparisons)
+		previous = feature.last(features)
+
+
+def calculate_sequence(source, feature, store=None, workers=1):
+	if workers > 1:
+		count = max(workers * SEGMENTS_PER_WORKER, int(math.ceil(len(source) / feature.segment_frames)))
+		segments = source.segments(count)
+		if len(segments) > 1:
+			return calculate_segments(segments, feature, workers, store, len(source))
+
+	distances = []
+
+	progress_bar = tqdm(total=len(source) or None, desc="shots detection")
+	for frame_count, batch_distances in sequence(source, feature, store):
+		distances.extend(np.asarray(batch_distances, dtype=np.float64).tolist())
+		progress_bar.set_postfix(source.stats(), refresh=False)
+		progress_bar.update(frame_count)
+	progress_bar.close()
+
+	return distances
+
+
+def calculate_segments(segments, feature, workers, store=None, frame_count=None):
+	"""Calculates the sequences of the segments in a process pool and joins them in order. Each segment starts with
+	the last frame of the segment before, so the joined sequence is the same as the sequence of the whole source."""
+	distances = []
+	tasks = [(segment, feature, store is not None) for segment in segments]
+
+	progress_bar = tqdm(total=frame_count, desc="shots detection")
+	with Pool(workers, initializer=init_worker) as pool:
+		for i, (segment_distances, arrays) in enumerate(pool.imap(segment_sequence, tasks)):
+			distances.extend(segment_distances)
+			store is not None and store.extend(arrays, len(segment_distances), i > 0)
+			progress_bar.update(len(segment_distances) + (1 if i == 0 else 0))
+	progress_bar.close()
+
+	return distances
+
+
+def init_worker():
+	# the workers already use all cores, threads of opencv would only compete with them
+	cv2.setNumThreads(1)
+
+
+def segment_sequence(task):
+	source, feature, keep_arrays = task
+	store = FeatureStore(feature, source.start_index) if keep_arrays else None
+
+	distances = []
+	for _, batch_distances in sequence(source, feature, store):
+		distances.extend(np.asarray(batch_distances, dtype=np.float64).tolist())
+
+	return distances, store.concatenated() if store is not None else None
+
+
+def coarse_to_fine_sequence(source, feature, stride, bound):
+	"""Compares every stride-th frame first and calculates the distances of consecutive frames only between
+	samples whose distance is above bound. Refined intervals grow into their neighbours until the distances at
+	their edges are below bound as well. The other distances are 0, the second derivative has no peaks there.
+
+	Returns the sequence and the number of decoded frames. The source needs random access.
+	"""
+	length = len(source)
+	if length < 2:
+		return [], length
+
+	offsets = list(range(0, length, stride))
+	if offsets[-1] != length - 1:
+		offsets.append(length - 1)
+
+	coarse = []
+	progress_bar = tqdm(total=len(offsets), desc="coarse detection")
+	for frame_count, batch_distances in sequence(source.sample(offsets), feature):
+		coarse.extend(batch_distances)
+		progress_bar.update(frame_count)
+	progress_bar.close()
+
+	distances = np.zeros(length - 1)
+	decoded = len(offsets)
+
+	refined = set()
+	pending = {i for i, distance in enumerate(coarse) if distance > bound}
+
+	progress_bar = tqdm(total=length, desc="fine detection")
+	while pending:
+		for first, last in runs(pending):
+			first_pair, last_pair = offsets[first], offsets[last + 1] - 1
+			segment = source.subrange(first_pair, last_pair - first_pair + 2)
+			position = first_pair
+
+			for frame_count, batch_distances in sequence(segment, feature):
+				distances[position:position + len(batch_distances)] = batch_distances
+				position += len(batch_distances)
+				progress_bar.update(frame_count)
+
+			decoded += last_pair - first_pair + 2
+
+		refined |= pending
+		pending = set()
+
+		for first, last in runs(refined):
+			first_pair, last_pair = offsets[first], offsets[last + 1] - 1
+
+			if first > 0 and distances[first_pair:first_pair + EDGE_DISTANCES].max() > bound:
+				pending.add(first - 1)
+			if last < len(coarse) - 1 and distances[last_pair + 1 - EDGE_DISTANCES:last_pair + 1].max() > bound:
+				pending.add(last + 1)
+	progress_bar.close()
+
+	return distances.tolist(), decoded
+
+
+def runs(indices):
+	"""The first and last index of every run of consecutive indices."""
+	result = []
+	for index in sorted(indices):
+		if result and index == result[-1][1] + 1:
+			result[-1] = (result[-1][0], index)
+		else:
+			result.append((index, index))
+
+	return result
@@ -0,0 +1,307 @@
+import copy
+import math
+import os
+import subprocess
+from os.path import basename, dirname, join, normpath
+
+import cv2
+import numpy as np
+
+from analyzer.constants import FRAME_RATE, FRAME_WIDTH
+from analyzer.frame_store import FrameStore, HEADER_FILENAME
+from analyzer.manifest import Manifest
+from analyzer.prefetch import Prefetcher
+from analyzer.project import Project
+from analyzer.utils import extract_index, image_filename
+
+DECODE_FLAGS = {
+	1: cv2.IMREAD_COLOR,
+	2: cv2.IMREAD_REDUCED_COLOR_2,
+	4: cv2.IMREAD_REDUCED_COLOR_4,
+	8: cv2.IMREAD_REDUCED_COLOR_8,
+}
+
+
+class FrameSource(object):
+	"""Ordered BGR frames of a movie. Indices are 1-based like the file names written by split."""
+
+	start_index = 1
+	# subranges hold the same frames as a continuous iteration and the length is known before the iteration, sources
+	# without an exact length may have a length of 0 if it is unknown
+	exact_seeking = True
+	exact_length = True
+	random_access = True
+
+	def __len__(self):
+		raise NotImplementedError
+
+	def __iter__(self):
+		raise NotImplementedError
+
+	def parameters(self):
+		"""Describes where the frames come from and which frames these are, distances of sources with other
+		parameters aren't comparable."""
+		raise NotImplementedError
+
+	def stats(self):
+		"""Statistics of the last iteration, shown next to the progress bar."""
+		return {}
+
+	def segments(self, count):
+		"""Splits the source into at most count consecutive sources. Neighbouring segments share one frame, so every
+		pair of consecutive frames is part of exactly one segment."""
+		length = len(self)
+		if count <= 1 or length <= 2 or not self.exact_seeking:
+			return [self]
+
+		size = int(math.ceil((length - 1) / count))
+		last_start = size * ((length - 2) // size)
+
+		return [self.subrange(start, size + 1 if start < last_start else None) for start in range(0, length - 1, size)]
+
+	def sample(self, offsets):
+		"""The frames at the given offsets from the first frame, for sources with random access."""
+		raise NotImplementedError
+
+	def subrange(self, offset, count=None):
+		"""The source of count frames starting offset frames after the first frame, all remaining frames if count
+		is None."""
+		raise NotImplementedError
+
+
+class ImageFolder(FrameSource):
+	"""Decodes the jpg frames with a Prefetcher, so the next frames are read while the current ones are compared."""
+
+	def __init__(self, image_paths, decode_scale=1, signature=None):
+		self.image_paths = image_paths
+		self.decode_scale = decode_scale
+		# describes all frames of the folder, not only the ones of this source
+		self.signature = signature
+		self.start_index = extract_index(image_paths[0]) if image_paths else 1
+		self.prefetcher = None
+
+	def __len__(self):
+		return len(self.image_paths)
+
+	def __iter__(self):
+		self.prefetcher = Prefetcher(self.read, self.image_paths)
+		return iter(self.prefetcher)
+
+	def read(self, path):
+		return read_image(path, self.decode_scale)
+
+	def parameters(self):
+		folder = basename(dirname(self.image_paths[0])) if self.image_paths else None
+		return {"source": folder, "decodeScale": self.decode_scale, "frames": self.signature}
+
+	def stats(self):
+		return self.prefetcher.stats() if self.prefetcher is not None else {}
+
+	def sample(self, offsets):
+		return Prefetcher(self.read, [self.image_paths[offset] for offset in offsets])
+
+	def subrange(self, offset, count=None):
+		stop = offset + count if count is not None else None
+		return ImageFolder(self.image_paths[offset:stop], self.decode_scale, self.signature)
+
+
+class StoredFrames(FrameSource):
+	"""Iterates the memory mapped frames of a FrameStore, no decoding involved."""
+
+	def __init__(self, store, limit=None):
+		self.store = store
+
+		if limit:
+			self.start_index = max(int(limit[0]), 1)
+			self.stop = min(int(limit[1]), len(store))
+		else:
+			self.stop = len(store)
+
+	def __len__(self):
+		return max(self.stop - self.start_index + 1, 0)
+
+	def __iter__(self):
+		return self.store.frames(self.start_index - 1, self.stop)
+
+	def parameters(self):
+		return {"source": basename(normpath(self.store.path)), "shape": list(self.store.shape),
+		        "frames": file_signature(join(self.store.path, HEADER_FILENAME))}
+
+	def sample(self, offsets):
+		return (self.store[self.start_index - 1 + offset] for offset in offsets)
+
+	def subrange(self, offset, count=None):
+		start_index = self.start_index + offset
+		stop = start_index + count - 1 if count is not None else self.stop
+
+		return StoredFrames(self.store, (start_index, min(stop, self.stop)))
+
+
+class VideoStream(FrameSource):
+	"""Decodes a video with ffmpeg and pipes the raw frames into numpy arrays, no frames are written to disk."""
+
+	random_access = False
+
+	def __init__(self, src, limit=None, width=FRAME_WIDTH, fps=FRAME_RATE):
+		self.src = src
+		self.fps = fps
+
+		source_width, source_height, self.source_fps, duration = probe(src)
+		self.width, self.height = scaled_size(source_width, source_height, width)
+
+		# streams without a container duration (raw .h264, some .ts) have an unknown length of 0
+		frame_count = max(int(round(duration * fps)), 0)
+
+		if limit:
+			self.start_index = int(limit[0])
+			# a limit beyond the end of the video only gets the frames up to its end
+			stop = min(int(limit[1]), frame_count) if frame_count > 0 else int(limit[1])
+			self.count = max(stop - self.start_index + 1, 0)
+		else:
+			self.count = None
+
+		self.length = self.count if self.count is not None else frame_count
+
+		# seeking only lands on the same frames as a continuous decode if ffmpeg doesn't convert the frame rate
+		self.exact_seeking = abs(self.source_fps - fps) < 0.01
+		self.exact_length = self.count is not None
+
+	def __len__(self):
+		return self.length
+
+	def __iter__(self):
+		return self.frames(self.start_index, self.count)
+
+	def parameters(self):
+		return {"source": basename(self.src), "size": [self.width, self.height], "fps": self.fps,
+		        "frames": file_signature(self.src)}
+
+	def subrange(self, offset, count=None):
+		stream = copy.copy(self)
+		stream.start_index = self.start_index + offset
+
+		if count is None:
+			count = self.count - offset if self.count is not None else None
+
+		stream.count = count
+		stream.length = count if count is not None else max(self.length - offset, 0)
+		stream.exact_length = count is not None
+
+		return stream
+
+	def frames(self, start_index, count=None):
+		frame_size = self.width * self.height * 3
+		process = subprocess.Popen(self.command(start_index, count), stdout=subprocess.PIPE, bufsize=frame_size * 4)
+
+		try:
+			while True:
+				buffer = process.stdout.read(frame_size)
+				if len(buffer) < frame_size:
+					break
+
+				yield np.frombuffer(buffer, dtype=np.uint8).reshape((self.height, self.width, 3))
+		finally:
+			process.stdout.close()
+			process.kill()
+			process.wait()
+
+	def command(self, start_index, count=None):
+		args = ["ffmpeg", "-v", "error"]
+
+		offset = start_index - 1
+		if offset:
+			args += ["-ss", "{:.6f}".format(offset / self.fps)]
+
+		args += ["-i", self.src, "-f", "rawvideo", "-pix_fmt", "bgr24", "-r", str(self.fps),
+		         "-vf", "scale={}:{}".format(self.width, self.height)]
+
+		if count is not None:
+			args += ["-frames:v", str(count)]
+
+		return args + ["pipe:1"]
+
+
+def probe(src):
+	capture = cv2.VideoCapture(src)
+	if not capture.isOpened():
+		raise Exception("Could not open video {}".format(src))
+
+	width = int(capture.get(cv2.CAP_PROP_FRAME_WIDTH))
+	height = int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT))
+	fps = capture.get(cv2.CAP_PROP_FPS)
+	frame_count = capture.get(cv2.CAP_PROP_FRAME_COUNT)
+	capture.release()
+
+	# cv2 reports a negative frame count if the container doesn't know it
+	duration = frame_count / fps if fps and frame_count > 0 else 0
+
+	return width, height, fps, duration
+
+
+def file_signature(path):
+	"""Size and modification time of a file, they change if the file is written again."""
+	stat = os.stat(path)
+	return [stat.st_size, stat.st_mtime_ns]
+
+
+def scaled_size(width, height, target_width=FRAME_WIDTH):
+	"""Same size as ffmpeg's scale=<target_width>:-1, which rounds the height to the nearest integer."""
+	target_height = (2 * target_width * height + width) // (2 * width)
+
+	return target_width, target_height
+
+
+class ImageReader(object):
+	"""Random access to the jpg frames by their 0-based index, mirrors FrameStore."""
+
+	def __init__(self, path):
+		self.path = path
+
+	def __getitem__(self, index):
+		return cv2.imread(join(self.path, image_filename(index)))
+
+
+class VideoReader(object):
+	"""Random access to the frames of a video by seeking, mirrors ImageReader and FrameStore. Every access starts a
+	short ffmpeg process, which only decodes from the closest key frame of the video on."""
+
+	def __init__(self, src, width=FRAME_WIDTH, fps=FRAME_RATE):
+		self.stream = VideoStream(src, width=width, fps=fps)
+
+	def __getitem__(self, index):
+		return next(self.stream.frames(index + 1, 1), None)
+
+
+def read_image(path, decode_scale=1):
+	"""Decodes a jpg at 1/decode_scale of its size, libjpeg scales in the DCT domain which saves most of the decoding."""
+	return cv2.imread(path, DECODE_FLAGS[decode_scale])
+
+
+def create(project, limit=None, video=None, decode_scale=1):
+	if video:
+		return VideoStream(video, limit, width=FRAME_WIDTH // decode_scale)
+
+	store_path = project.folder_path(Project.Folder.frame_store)
+	if FrameStore.exists(store_path):
+		if decode_scale != 1:
+			print("The frame store isn't decoded, ignoring the decode scale")
+
+		return StoredFrames(FrameStore(store_path), limit)
+
+	# the detectors prefer the small proxy frames if split wrote them
+	frames = Manifest.load(project.folder_path(Project.Folder.proxy_frames))
+
+	if not len(frames):
+		frames = Manifest.load(project.folder_path(Project.Folder.frames))
+
+	image_paths = frames.slice(limit) if limit else frames.paths()
+
+	return ImageFolder(image_paths, decode_scale, frames.signature())
+
+
+def reader(project):
+	store_path = project.folder_path(Project.Folder.frame_store)
+	if FrameStore.exists(store_path):
+		return FrameStore(store_path)
+
+	return ImageReader(project.folder_path(Project.Folder.frames))
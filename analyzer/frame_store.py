@@ -0,0 +1,113 @@
+import glob
+import os
+from os.path import join
+
+import numpy as np
+from tqdm import tqdm
+
+from analyzer.path_utils import create_directory, load_json
+from analyzer.project import write_json
+
+CHUNK_SIZE = 250
+HEADER_FILENAME = "header.json"
+
+
+class FrameStore(object):
+	"""Read only access to frames stored by split as chunked .npy files. Chunks are memory mapped on first access.
+
+	Frames are addressed by their 0-based index, the same index shots and keyframes use.
+	"""
+
+	def __init__(self, path):
+		header = load_json(join(path, HEADER_FILENAME))
+
+		self.path = path
+		self.count = header["count"]
+		self.shape = tuple(header["shape"])
+		self.fps = header["fps"]
+		self.chunk_size = header["chunkSize"]
+
+		chunk_count = (self.count + self.chunk_size - 1) // self.chunk_size
+		self.chunks = [None] * chunk_count
+
+	def __len__(self):
+		return self.count
+
+	def __getitem__(self, index):
+		if not 0 <= index < self.count:
+			raise IndexError("frame index {} out of range".format(index))
+
+		chunk_index, offset = divmod(index, self.chunk_size)
+		return self.chunk(chunk_index)[offset]
+
+	def chunk(self, chunk_index):
+		if self.chunks[chunk_index] is None:
+			path = join(self.path, chunk_filename(chunk_index))
+			self.chunks[chunk_index] = np.load(path, mmap_mode="r")
+
+		return self.chunks[chunk_index]
+
+	def __getstate__(self):
+		# worker processes map the chunks themselves instead of receiving copies of them
+		state = dict(self.__dict__)
+		state["chunks"] = [None] * len(self.chunks)
+
+		return state
+
+	def frames(self, start=0, stop=None):
+		stop = self.count if stop is None else min(stop, self.count)
+
+		for index in range(start, stop):
+			yield self[index]
+
+	@staticmethod
+	def exists(path):
+		return os.path.exists(join(path, HEADER_FILENAME))
+
+
+def chunk_filename(chunk_index):
+	return "{:010d}.npy".format(chunk_index)
+
+
+def write(frames, path, fps, chunk_size=CHUNK_SIZE):
+	"""Writes the frames into chunks of chunk_size frames. The header is written last and marks the store complete."""
+	create_directory(path)
+	delete(path)
+
+	buffer = None
+	count = 0
+
+	progress_bar = tqdm(total=len(frames), desc="frame store")
+	for frame in frames:
+		if buffer is None:
+			buffer = np.empty((chunk_size,) + frame.shape, dtype=np.uint8)
+
+		buffer[count % chunk_size] = frame
+		count += 1
+
+		if count % chunk_size == 0:
+			np.save(join(path, chunk_filename(count // chunk_size - 1)), buffer)
+
+		progress_bar.update()
+	progress_bar.close()
+
+	if count % chunk_size:
+		np.save(join(path, chunk_filename(count // chunk_size)), buffer[:count % chunk_size])
+
+	header = {
+		"count": count,
+		"shape": list(buffer.shape[1:]) if buffer is not None else [],
+		"fps": fps,
+		"chunkSize": chunk_size,
+	}
+	write_json(join(path, HEADER_FILENAME), header)
+
+
+def delete(path):
+	"""Removes the header first, so an interrupted delete leaves no store which looks complete."""
+	header_path = join(path, HEADER_FILENAME)
+	if os.path.exists(header_path):
+		os.unlink(header_path)
+
+	for chunk_path in glob.glob(join(path, "*.npy")):
+		os.unlink(chunk_path)
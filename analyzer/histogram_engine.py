@@ -0,0 +1,147 @@
+import cv2
+import numpy as np
+
+from analyzer.constants import DistanceMetric
+from analyzer.features import Feature
+from analyzer.utils import flatten
+
+BATCH_SIZE = 32
+
+
+class HistogramEngine(Feature):
+	"""Colour histograms and their distances for a whole batch of frames at once.
+
+	The batch is converted to HSV with a single cvtColor call. The per-block histograms are counted with calcHist on
+	views of the blocks, the global histogram of a frame is the sum of its block histograms. Normalization and the
+	distances of consecutive frames are computed for the whole batch with numpy. The results match
+	shot_detection.histogram and shot_detection.quadrant_histograms.
+	"""
+
+	batch_size = BATCH_SIZE
+
+	def __init__(self, channel_sizes, blocks=True, rows=2, cols=2):
+		self.blocks = blocks
+
+		bins, ranges = zip(*channel_sizes)
+		self.bins = list(bins)
+		self.ranges = flatten(list(ranges))
+		self.bin_count = int(np.prod(self.bins))
+		self.rows = rows
+		self.cols = cols
+
+	def block_regions(self, shape):
+		"""Rows and columns of every block, using the same layout as utils.block_shaped."""
+		height, width = shape
+		window_width = round(width / self.rows)
+		window_height = round(height / self.cols)
+
+		return [(slice(c, c + window_height), slice(r, r + window_width))
+		        for c in range(0, height, window_height)
+		        for r in range(0, width, window_width)]
+
+	def counts(self, images, blocks=True):
+		"""Unnormalized histograms of the images with shape (frames, blocks, bins)."""
+		regions = self.block_regions(images.shape[1:3]) if blocks else [(slice(None), slice(None))]
+		counts = np.empty((len(images), len(regions), self.bin_count), dtype=np.float64)
+
+		for i, image in enumerate(images):
+			for j, (rows, columns) in enumerate(regions):
+				block = image[rows, columns]
+				counts[i, j] = cv2.calcHist([block], [0, 1, 2], None, self.bins, self.ranges).ravel()
+
+		return counts
+
+	def histograms(self, images, blocks=True):
+		"""L2 normalized block and global histograms like cv2.normalize."""
+		counts = self.counts(images, blocks)
+		return normalize(counts), normalize(counts.sum(axis=1, keepdims=True))
+
+	def extract(self, frames):
+		return self.counts(convert_images(frames), self.blocks)
+
+	def comparisons(self, previous, features):
+		if previous is not None:
+			features = np.concatenate([previous[None], features])
+
+		return consecutive_distances(normalize(features))
+
+	def key(self):
+		name = "histogram" if self.blocks else "simpleHistogram"
+		bins = "-".join(str(b) for b in self.bins)
+
+		return "{}_{}_{}x{}".format(name, bins, self.rows, self.cols) if self.blocks else "{}_{}".format(name, bins)
+
+	def arrays(self, features, comparisons):
+		return {"counts": features.astype(np.uint32)}
+
+	def rescore(self, arrays, metric=None, bins=None, chunk_size=4096):
+		"""Distances of consecutive frames from stored counts, optionally with another metric or coarser bins."""
+		counts = arrays["counts"]
+
+		distances = []
+		for start in range(0, len(counts) - 1, chunk_size):
+			chunk = counts[start:start + chunk_size + 1]
+			distances.append(self.pair_distances(chunk[:-1], chunk[1:], metric, bins))
+
+		return np.concatenate(distances) if distances else np.array([])
+
+	def pair_distances(self, counts0, counts1, metric=None, bins=None):
+		"""Distances between the stored counts of two frames for every pair, averaged over the blocks."""
+		metric_function = METRICS[metric or DistanceMetric.euclidean.value]
+		counts0, counts1 = counts0.astype(np.float64), counts1.astype(np.float64)
+
+		if bins:
+			counts0, counts1 = rebin(counts0, self.bins, bins), rebin(counts1, self.bins, bins)
+
+		return metric_function(normalize(counts0), normalize(counts1)).mean(axis=-1)
+
+
+def convert_images(frames):
+	"""Stacks BGR frames and converts them to HSV with one cvtColor call."""
+	images = np.stack(frames)
+	frame_count, height, width, channels = images.shape
+
+	converted = cv2.cvtColor(images.reshape((frame_count * height, width, channels)), cv2.COLOR_BGR2HSV)
+	return converted.reshape(images.shape)
+
+
+def normalize(counts):
+	norms = np.sqrt((counts ** 2).sum(axis=-1, keepdims=True))
+	norms[norms == 0] = 1
+
+	return counts / norms
+
+
+def rebin(counts, bins, target_bins):
+	"""Merges neighbouring bins of every channel, each target bin count has to divide the original bin count."""
+	shape = list(counts.shape[:-1])
+	for channel_bins, target in zip(bins, target_bins):
+		if channel_bins % target:
+			raise ValueError("{} bins can't be merged into {} bins".format(channel_bins, target))
+
+		shape += [target, channel_bins // target]
+
+	merged = counts.reshape(shape).sum(axis=tuple(range(len(counts.shape), len(shape), 2)))
+	return merged.reshape(counts.shape[:-1] + (-1,))
+
+
+def chi_square(histograms0, histograms1):
+	"""Like cv2.compareHist with HISTCMP_CHISQR, bins which are empty in the first histogram are skipped."""
+	squared = (histograms0 - histograms1) ** 2
+	ratios = np.divide(squared, histograms0, out=np.zeros_like(squared), where=histograms0 != 0)
+
+	return ratios.sum(axis=-1)
+
+
+METRICS = {
+	DistanceMetric.euclidean.value: lambda h0, h1: np.sqrt(((h1 - h0) ** 2).sum(axis=-1)),
+	DistanceMetric.manhattan.value: lambda h0, h1: np.abs(h1 - h0).sum(axis=-1),
+	DistanceMetric.chebyshev.value: lambda h0, h1: np.abs(h1 - h0).max(axis=-1),
+	DistanceMetric.chisqr.value: chi_square,
+}
+
+
+def consecutive_distances(histograms):
+	"""Euclidean distances between the histograms of consecutive frames, averaged over the blocks."""
+	differences = histograms[1:] - histograms[:-1]
+	return np.sqrt((differences ** 2).sum(axis=-1)).mean(axis=-1)
@@ -0,0 +1,89 @@
+from itertools import islice
+
+import numpy as np
+from tqdm import tqdm
+
+from analyzer import edge_detection
+from analyzer import frame_source
+from analyzer import shot_detection
+from analyzer.constants import ExtractionType
+from analyzer.project import Project
+from analyzer.sequence_store import SequenceStore
+from analyzer.utils import batches
+
+# pairs whose histogram distance is above this are candidates for a cut and get an edge change ratio, far below the
+# histogram distance of most cuts
+CANDIDATE_DISTANCE = 0.1
+
+
+def detect(project, threshold, limit=None, local_sequence=False, video=None, workers=1, decode_scale=1,
+           candidate_distance=None, registration=None):
+	"""Shots from the edge change ratio, which is only calculated for the pairs of frames whose histogram distance
+	is above candidate_distance. The histogram sequence is kept in the sequence store like the one of histogram."""
+	source = frame_source.create(project, limit, video, decode_scale)
+
+	if local_sequence:
+		sequence = project.read(Project.File.shot_change_ratio)
+	else:
+		engine = shot_detection.histogram_feature(ExtractionType.histogram.value)
+		sequences = SequenceStore.load(project, engine.key(), source.parameters())
+		histogram_sequence = sequences.calculate(source, engine, workers=workers)
+		sequences.save()
+
+		sequence = confirmed_sequence(source, histogram_sequence, candidate_distance, registration)
+		sequence and project.write(sequence, Project.File.shot_change_ratio)
+
+	return edge_detection.extract_shots(sequence, source.start_index, threshold, project)
+
+
+def calculate_sequence(source, candidate_distance=None, registration=None, workers=1):
+	histogram_sequence = shot_detection.calculate_sequence(source, ExtractionType.histogram.value, workers=workers)
+
+	return confirmed_sequence(source, histogram_sequence, candidate_distance, registration)
+
+
+def confirmed_sequence(source, histogram_sequence, candidate_distance=None, registration=None):
+	"""The edge change ratios of the candidates of the histogram sequence, edgeim with the registration if one is
+	given, and 0 for all other pairs."""
+	candidate_distance = candidate_distance if candidate_distance is not None else CANDIDATE_DISTANCE
+	candidates = np.flatnonzero(np.asarray(histogram_sequence) > candidate_distance)
+	print("Comparing the edges of {} of {} pairs".format(len(candidates), len(histogram_sequence)))
+
+	feature = edge_detection.edge_feature(registration is not None, registration)
+	return candidate_sequence(source, feature, candidates.tolist(), len(histogram_sequence))
+
+
+def candidate_sequence(source, feature, candidates, length):
+	"""The distances of the feature for the candidate pairs, given by the offset of their first frame, and 0 for all
+	other pairs. Only the frames of the candidates are decoded if the source has random access."""
+	distances = np.zeros(length)
+	if not candidates:
+		return distances.tolist()
+
+	pairs = set(candidates)
+	offsets = sorted(pairs | {candidate + 1 for candidate in candidates})
+
+	if source.random_access:
+		frames = source.sample(offsets)
+	else:
+		needed = set(offsets)
+		frames = (frame for offset, frame in enumerate(islice(source, offsets[-1] + 1)) if offset in needed)
+
+	compared = []
+	comparisons = []
+	previous = None
+
+	progress_bar = tqdm(total=len(offsets), desc="edge confirmation")
+	for batch_offsets, batch in zip(batches(offsets, feature.batch_size), batches(frames, feature.batch_size)):
+		for offset, current in zip(batch_offsets, feature.extract(batch)):
+			# offsets holds both frames of every candidate, so previous is the first frame of the pair
+			if offset - 1 in pairs:
+				compared.append(offset - 1)
+				comparisons.append(feature.compare(previous, current))
+
+			previous = current
+		progress_bar.update(len(batch))
+	progress_bar.close()
+
+	distances[compared] = feature.score(comparisons)
+	return distances.tolist()
@@ -5,13 +5,16 @@ from sklearn.cluster import KMeans
 from os import path
 from tqdm import tqdm
 
+from analyzer.prefetch import Prefetcher
 from analyzer.project import Project
 from analyzer.utils import image_filename
 
 
 def colors_from_image(image_path, count):
-	gbr_image = cv2.imread(image_path)
+	return colors(cv2.imread(image_path), count)
 
+
+def colors(gbr_image, count):
 	rgb_image = cv2.cvtColor(gbr_image, cv2.COLOR_BGR2RGB)
 	img = rgb_image.reshape((rgb_image.shape[0] * rgb_image.shape[1], 3))
 
@@ -53,13 +56,15 @@ def rearrange_cluster(colors):
 
 
 def run(project, shots, cluster_count):
-	progress_bar = tqdm(total=len(shots), desc="colors")
+	keyframes_path = project.folder_path(Project.Folder.keyframes)
+	image_paths = [path.join(keyframes_path, image_filename(shot.keyframe.index)) for shot in shots]
+	images = Prefetcher(cv2.imread, image_paths)
 
-	for shot in shots:
-		filename = image_filename(shot.keyframe.index)
-		image_path = path.join(project.folder_path(Project.Folder.keyframes), filename)
+	progress_bar = tqdm(total=len(shots), desc="colors")
 
-		shot.keyframe.colors = colors_from_image(image_path, cluster_count)
+	for shot, image in zip(shots, images):
+		shot.keyframe.colors = colors(image, cluster_count)
+		progress_bar.set_postfix(images.stats(), refresh=False)
 		progress_bar.update()
 
 	progress_bar.close()
@@ -0,0 +1,89 @@
+import json
+import os
+import re
+import time
+from bisect import bisect_left, bisect_right
+from os.path import dirname, join, normpath
+
+from analyzer.path_utils import filename
+
+FRAME_FILE_PATTERN = re.compile(r"^(\d+)\.jpg$")
+
+# folders modified within this period aren't cached, file systems with coarse timestamps could miss later changes
+RACY_PERIOD = 2.0
+
+
+class Manifest(object):
+	"""Sorted listing of the numbered jpg files in a folder with their index, size and modification time.
+
+	The listing is cached in <folder>.manifest.json next to the folder and is rebuilt when the modification time of
+	the folder changes.
+	"""
+
+	def __init__(self, path, entries, folder_mtime=None):
+		self.path = path
+		self.entries = entries
+		self.indices = [entry[0] for entry in entries]
+		self.folder_mtime = folder_mtime
+
+	def __len__(self):
+		return len(self.entries)
+
+	def paths(self):
+		return [join(self.path, entry[1]) for entry in self.entries]
+
+	def slice(self, limit):
+		"""Paths of the files with an index between the lower and upper limit, both inclusive."""
+		lower = bisect_left(self.indices, int(limit[0]))
+		upper = bisect_right(self.indices, int(limit[1]))
+
+		return [join(self.path, entry[1]) for entry in self.entries[lower:upper]]
+
+	def signature(self):
+		"""The number of files and the latest modification of the folder or a file, changes if the frames are
+		written again."""
+		return [len(self.entries), max([self.folder_mtime or 0] + [entry[3] for entry in self.entries])]
+
+	@classmethod
+	def load(cls, path):
+		path = normpath(path)
+		folder_mtime = os.stat(path).st_mtime_ns
+		cache_path = manifest_path(path)
+
+		if os.path.exists(cache_path):
+			with open(cache_path) as data:
+				cached = json.load(data)
+
+			if cached["folderMtime"] == folder_mtime:
+				return cls(path, [tuple(entry) for entry in cached["entries"]], folder_mtime)
+
+		entries = scan(path)
+
+		if time.time() - folder_mtime / 1e9 > RACY_PERIOD:
+			with open(cache_path, "w") as outfile:
+				json.dump({"folderMtime": folder_mtime, "entries": entries}, outfile)
+
+		return cls(path, [tuple(entry) for entry in entries], folder_mtime)
+
+
+def manifest_path(path):
+	return join(dirname(path), "{}.manifest.json".format(filename(path)))
+
+
+def scan(path):
+	entries = []
+	for entry in os.scandir(path):
+		match = FRAME_FILE_PATTERN.match(entry.name)
+		if match is None or not entry.is_file():
+			continue
+
+		stat = entry.stat()
+		entries.append([int(match.group(1)), entry.name, stat.st_size, stat.st_mtime_ns])
+
+	entries.sort(key=lambda entry: (entry[0], entry[1]))
+
+	return entries
+
+
+def paths(path):
+	return Manifest.load(path).paths()
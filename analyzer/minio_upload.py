@@ -1,10 +1,10 @@
-import glob
 from tqdm import tqdm
 from analyzer.project import Project, StoragePath
 from minio import Minio
 from minio.policy import Policy
 from minio.error import ResponseError
 
+from analyzer import manifest
 from analyzer.utils import env
 from analyzer.path_utils import filename
 from os.path import join
@@ -61,7 +61,7 @@ class Uploader(object):
 		self.upload_images(source_path, remote_path)
 
 	def upload_images(self, source_path, destination_path):
-		image_paths = sorted(glob.glob(join(source_path, "*.jpg")))
+		image_paths = manifest.paths(source_path)
 
 		progress_bar = tqdm(total=len(image_paths), desc="upload")
 		for path in image_paths:
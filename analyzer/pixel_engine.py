@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+
+from analyzer.features import Feature
+
+BATCH_SIZE = 64
+
+# width and height of the grayscale proxy of a frame
+PROXY_SIZE = (64, 36)
+
+
+class PixelEngine(Feature):
+	"""Mean absolute difference of small grayscale proxies of consecutive frames.
+
+	Every frame is scaled down to the proxy size with an area interpolation before the conversion to grayscale, so
+	most of the work per frame is a single resize. The differences of all pairs of a batch are computed with one numpy
+	expression and scaled to 0 to 1.
+	"""
+
+	batch_size = BATCH_SIZE
+
+	def __init__(self, size=PROXY_SIZE):
+		self.size = tuple(size)
+
+	def extract(self, frames):
+		"""Grayscale proxies of the frames with shape (frames, height, width)."""
+		width, height = self.size
+		proxies = np.empty((len(frames), height, width), dtype=np.uint8)
+
+		for i, frame in enumerate(frames):
+			proxy = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+			cv2.cvtColor(proxy, cv2.COLOR_BGR2GRAY, proxies[i])
+
+		return proxies
+
+	def comparisons(self, previous, features):
+		if previous is not None:
+			features = np.concatenate([previous[None], features])
+
+		return mean_absolute_differences(features[:-1], features[1:])
+
+	def key(self):
+		return "pixel_{}x{}".format(*self.size)
+
+	def arrays(self, features, comparisons):
+		return {"proxies": features}
+
+	def rescore(self, arrays, metric=None, bins=None):
+		"""Differences of consecutive frames from stored proxies, metric and bins only apply to histograms."""
+		proxies = arrays["proxies"]
+		return mean_absolute_differences(proxies[:-1], proxies[1:])
+
+
+def mean_absolute_differences(proxies0, proxies1):
+	"""The mean absolute difference of every pair of proxies divided by 255."""
+	differences = np.abs(proxies0.astype(np.int16) - proxies1.astype(np.int16))
+	return differences.mean(axis=(1, 2)) / 255
@@ -1,9 +1,57 @@
 from matplotlib import pyplot as plt
 plt.switch_backend('agg')
 
+from concurrent.futures import ProcessPoolExecutor
 from os.path import join
 
+import numpy as np
+
+# plots are only rendered if enabled by configure, series are downsampled to at most POINTS points before drawing
+ENABLED = False
+POINTS = 2000
+
+executor = None
+
+
+def configure(enabled=None, points=None):
+	global ENABLED, POINTS
+
+	ENABLED = enabled if enabled is not None else ENABLED
+	POINTS = points if points is not None else POINTS
+
+
 def plot(title, datum, scatter=None, project=None, store=False, xlim=None, ylim=None):
+	"""Draws the series of datum and the scatter points. Stored plots are rendered by a background process, the
+	caller doesn't wait for them. Does nothing unless plots are enabled."""
+	if not ENABLED:
+		return
+
+	series = [lttb(np.arange(len(data)), np.asarray(data, dtype=np.float64), POINTS) for data in datum]
+
+	if not store:
+		render(title, series, scatter, None, xlim, ylim)
+		return
+
+	path = join(project.folder_path("plots"), "{}.png".format(title))
+	background().submit(render, title, series, scatter, path, xlim, ylim).add_done_callback(report_failure)
+
+
+def background():
+	"""A single worker process renders the plots one after the other, it is joined when the interpreter exits."""
+	global executor
+
+	if executor is None:
+		executor = ProcessPoolExecutor(max_workers=1)
+
+	return executor
+
+
+def report_failure(future):
+	if future.exception() is not None:
+		print("Plot failed: {}".format(future.exception()))
+
+
+def render(title, series, scatter=None, path=None, xlim=None, ylim=None):
 	plt.figure("Results {}".format(title))
 	if xlim:
 		plt.xlim(xlim)
@@ -11,20 +59,42 @@ def plot(title, datum, scatter=None, project=None, store=False, xlim=None, ylim=
 	if ylim:
 		plt.ylim(ylim)
 
-	for data in datum:
-		plt.plot(data)
+	for x, y in series:
+		plt.plot(x, y)
 
 	if scatter:
 		for x, y in scatter:
 			plt.scatter(x, y, color="green")
 
-	if not store:
+	if path is None:
 		plt.show()
 	else:
-		base_path = project.folder_path("plots")
-		path = join(base_path, "{}.png".format(title))
 		plt.savefig(path)
 
 	plt.clf()
 	plt.cla()
 	plt.close()
+
+
+def lttb(x, y, threshold):
+	"""Largest triangle three buckets downsampling. Keeps the first and the last point and from every bucket in
+	between the point which spans the largest triangle with the point kept before and the average of the next bucket,
+	so peaks of the series survive."""
+	if threshold >= len(x) or threshold < 3:
+		return x, y
+
+	edges = np.linspace(1, len(x) - 1, threshold - 1).astype(int)
+	sizes = np.diff(edges)
+	averages_x = np.append(np.add.reduceat(x[:edges[-1]], edges[:-1]) / sizes, x[-1])
+	averages_y = np.append(np.add.reduceat(y[:edges[-1]], edges[:-1]) / sizes, y[-1])
+
+	selected = [0]
+	for start, end, average_x, average_y in zip(edges[:-1], edges[1:], averages_x[1:], averages_y[1:]):
+		previous = selected[-1]
+		areas = np.abs((x[previous] - average_x) * (y[start:end] - y[previous]) -
+		               (x[previous] - x[start:end]) * (average_y - y[previous]))
+		selected.append(start + int(np.argmax(areas)))
+
+	selected.append(len(x) - 1)
+
+	return x[selected], y[selected]
@@ -0,0 +1,54 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+# frames loaded ahead of the consumer and the threads loading them, changed by configure
+DEPTH = 16
+THREADS = 4
+
+
+def configure(depth=None, threads=None):
+	global DEPTH, THREADS
+
+	DEPTH = depth if depth is not None else DEPTH
+	THREADS = threads if threads is not None else THREADS
+
+
+class Prefetcher(object):
+	"""Iterates load(key) for all keys in order while a thread pool already loads the following items. At most depth
+	items are loaded ahead, which bounds the memory of decoded frames waiting for the consumer.
+
+	cv2.imread and cv2.cvtColor release the GIL, so decoding overlaps with the work on the previous frames.
+	"""
+
+	def __init__(self, load, keys, depth=None, threads=None):
+		self.load = load
+		self.keys = keys
+		self.depth = max(depth if depth is not None else DEPTH, 1)
+		self.threads = max(threads if threads is not None else THREADS, 1)
+
+		self.loaded = 0
+		self.waiting = 0.0
+
+	def __iter__(self):
+		keys = iter(self.keys)
+
+		with ThreadPoolExecutor(max_workers=self.threads) as executor:
+			pending = deque(executor.submit(self.load, key) for key in islice(keys, self.depth))
+
+			while pending:
+				future = pending.popleft()
+
+				start = time.time()
+				item = future.result()
+				self.waiting += time.time() - start
+				self.loaded += 1
+
+				pending.extend(executor.submit(self.load, key) for key in islice(keys, 1))
+
+				yield item
+
+	def stats(self):
+		"""Shown next to the progress bars. waiting is the time the consumer was blocked by loading."""
+		return {"prefetch": self.depth, "threads": self.threads, "waiting": "{:.1f}s".format(self.waiting)}
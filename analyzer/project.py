@@ -40,6 +40,10 @@ class Project(Model):
 		keyframe_thumbnails = 3
 		spatio = 4
 		plots = 5
+		frame_store = 6
+		proxy_frames = 7
+		features = 8
+		sequences = 9
 
 		def __str__(self):
 			return {
@@ -48,6 +52,10 @@ class Project(Model):
 				Project.Folder.keyframe_thumbnails: "keyframe_thumbnails",
 				Project.Folder.spatio: "spatio_temporal_slices",
 				Project.Folder.plots: "plots",
+				Project.Folder.frame_store: "frame_store",
+				Project.Folder.proxy_frames: "proxy_frames",
+				Project.Folder.features: "features",
+				Project.Folder.sequences: "sequences",
 			}[self]
 
 	class File(Enum):
@@ -59,6 +67,8 @@ class Project(Model):
 		script = 6
 		keyframe_montage = 7
 		shot_change_ratio = 8
+		threshold_sweep = 9
+		ensemble_score = 10
 
 		def __str__(self):
 			return {
@@ -70,6 +80,8 @@ class Project(Model):
 				Project.File.script: "script.json",
 				Project.File.keyframe_montage: "keyframe_montage.jpg",
 				Project.File.shot_change_ratio: "shot_change_ratio.json",
+				Project.File.threshold_sweep: "threshold_sweep.json",
+				Project.File.ensemble_score: "ensemble_score.json",
 			}[self]
 
 	def setup(self):
@@ -1,8 +1,8 @@
 import boto3
 from boto3.session import Session
 from botocore.client import ClientError
-import glob
 from os.path import join
+from analyzer import manifest
 from analyzer.path_utils import filename
 from analyzer.project import StoragePath, Project
 from analyzer.utils import env
@@ -55,7 +55,7 @@ def upload_slices(project):
 def upload_images(source_path, destination_path):
 	bucket = connect_bucket()
 
-	image_paths = sorted(glob.glob(join(source_path, "*.jpg")))
+	image_paths = manifest.paths(source_path)
 	for path in image_paths:
 		remote_path = join(destination_path, filename(path))
 
@@ -0,0 +1,130 @@
+import json
+import os
+from os.path import join
+
+from analyzer import features
+from analyzer.project import Project, write_json
+
+
+class SequenceStore(object):
+	"""The shot change ratio of a feature by frame ranges, stored as DATA_DIR/<project>/sequences/<key>.json.
+
+	A distance is addressed by the 1-based index of the first frame of the pair it compares. Runs with a limit only
+	calculate the distances which aren't stored yet and merge them into the ranges of previous runs. The stored
+	distances are dropped if the feature or the frames they were calculated from changed.
+	"""
+
+	def __init__(self, path, parameters, ranges=None):
+		self.path = path
+		self.parameters = parameters
+		self.ranges = ranges or []
+
+	@classmethod
+	def load(cls, project, key, parameters):
+		path = join(project.folder_path(Project.Folder.sequences), "{}.json".format(key))
+		parameters = dict(parameters, feature=key)
+
+		if os.path.exists(path):
+			with open(path) as data:
+				stored = json.load(data)
+
+			if stored["parameters"] == parameters:
+				return cls(path, parameters, [(entry["start"], entry["distances"]) for entry in stored["ranges"]])
+
+		return cls(path, parameters)
+
+	def save(self):
+		ranges = [{"start": start, "distances": distances} for start, distances in self.ranges]
+		write_json(self.path, {"parameters": self.parameters, "ranges": ranges})
+
+	def insert(self, start, distances):
+		"""Adds the distances starting with the pair of start, they replace stored distances of the same pairs."""
+		if not distances:
+			return
+
+		stop = start + len(distances)
+
+		ranges = [(start, list(distances))]
+		for range_start, range_distances in self.ranges:
+			range_stop = range_start + len(range_distances)
+
+			if range_start < start:
+				ranges.append((range_start, range_distances[:start - range_start]))
+			if range_stop > stop:
+				offset = max(stop - range_start, 0)
+				ranges.append((range_start + offset, range_distances[offset:]))
+
+		merged = []
+		for range_start, range_distances in sorted(ranges, key=lambda entry: entry[0]):
+			if not range_distances:
+				continue
+
+			if merged and merged[-1][0] + len(merged[-1][1]) == range_start:
+				merged[-1] = (merged[-1][0], merged[-1][1] + range_distances)
+			else:
+				merged.append((range_start, range_distances))
+
+		self.ranges = merged
+
+	def missing(self, first, last):
+		"""The ranges of pairs between first and last, both inclusive, without a stored distance."""
+		gaps = []
+		position = first
+
+		for range_start, range_distances in self.ranges:
+			range_last = range_start + len(range_distances) - 1
+			if range_last < position:
+				continue
+			if range_start > last:
+				break
+
+			if range_start > position:
+				gaps.append((position, range_start - 1))
+			position = range_last + 1
+
+		if position <= last:
+			gaps.append((position, last))
+
+		return gaps
+
+	def slice(self, first, last):
+		"""The stored distances from first to last, both inclusive, None if some of them are missing."""
+		for range_start, range_distances in self.ranges:
+			if range_start <= first and last < range_start + len(range_distances):
+				return range_distances[first - range_start:last - range_start + 1]
+
+		return None
+
+	def read(self, source):
+		"""The stored sequence of the source, None if the source isn't covered."""
+		return self.slice(source.start_index, source.start_index + len(source) - 2)
+
+	def calculate(self, source, feature, store=None, workers=1):
+		"""The sequence of the source. Only the pairs without stored distances are calculated if the source can
+		be split exactly, features for a FeatureStore need all frames."""
+		first, last = source.start_index, source.start_index + len(source) - 2
+
+		if store is not None or not source.exact_seeking or not source.exact_length:
+			sequence = features.calculate_sequence(source, feature, store, workers)
+			self.insert(first, sequence)
+			return sequence
+
+		if last < first:
+			return []
+
+		missing = self.missing(first, last)
+		if not missing:
+			print("Using the stored distances of the frames {} to {}".format(first, last + 1))
+
+		for gap_first, gap_last in missing:
+			segment = source.subrange(gap_first - first, gap_last - gap_first + 2)
+			sequence = features.calculate_sequence(segment, feature, workers=workers)
+			self.insert(gap_first, sequence)
+
+			if len(sequence) < gap_last - gap_first + 1:
+				# the source is shorter than its length promised, the sequence ends with its last frame
+				last = gap_first + len(sequence) - 1
+				print("The frames end with frame {}, the sequence is shorter than expected".format(last + 1))
+				break
+
+		return self.slice(first, last) or []
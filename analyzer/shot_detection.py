@@ -1,8 +1,9 @@
-import glob
 import math
 import os
 import shlex
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from os.path import join
 from pprint import pprint
 from shutil import copy2
@@ -14,16 +15,39 @@ import numpy as np
 from scipy.spatial import distance as dist
 from tqdm import tqdm
 
+from analyzer import feature_store
+from analyzer import features
+from analyzer import frame_source
+from analyzer import manifest
 from analyzer import path_utils
 from analyzer import utils
 from analyzer import plot as uplot
 from analyzer.constants import ExtractionType
+from analyzer.feature_store import FeatureStore
+from analyzer.frame_store import FrameStore
+from analyzer.histogram_engine import HistogramEngine
+from analyzer.pixel_engine import PixelEngine
+from analyzer.prefetch import Prefetcher
 from analyzer.project import Project
-from analyzer.utils import Model, image_filename, derivative, slice_paths, extract_index, window
+from analyzer.sequence_store import SequenceStore
+from analyzer.utils import Model, image_filename, derivative
 
 HSV_COLOR_SPACE = [(8, [0, 256]), (4, [0, 256]), (4, [0, 256])]
 RGB_CHANNEL_SIZES = [(8, [0, 256]), (8, [0, 256]), (8, [0, 256])]
 
+# intervals of the coarse detection are refined if their distance is above this fraction of the threshold
+STRIDE_BOUND_FACTOR = 0.5
+
+# a window of distances above the lower threshold of the twin comparison is a gradual transition if the frames before
+# and after it differ by more than GRADUAL_DISTANCE, distances below the lower threshold are bridged up to GRADUAL_GAP
+GRADUAL_DISTANCE = 0.5
+GRADUAL_GAP = 2
+GRADUAL_MIN_LENGTH = 5
+# windows whose largest distance is above this share of the accumulated distance are cuts
+GRADUAL_CUT_SHARE = 0.5
+# cuts which are at most this many frames outside of a gradual transition belong to it
+GRADUAL_CUT_TOLERANCE = 1
+
 
 SCIPY_METHODS = (
 	("Euclidean", dist.euclidean),
@@ -135,8 +159,11 @@ def load_image(path):
 	if image is None:
 		return None
 
-	image = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
-	return image
+	return convert_image(image)
+
+
+def convert_image(image):
+	return cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
 
 
 def plot(data, title, project, store=False):
@@ -155,24 +182,85 @@ def plot(data, title, project, store=False):
 	plt.close()
 
 
-def detect(project, threshold, limit=None, local_sequence=False, type=None):
-	src = project.folder_path(Project.Folder.frames)
-	image_paths = sorted(glob.glob(src + "/*.jpg"))
-
-	if limit:
-		image_paths = slice_paths(image_paths, limit)
+def detect(project, threshold, limit=None, local_sequence=False, type=None, video=None, store_features=False,
+           from_features=False, metric=None, bins=None, workers=1, decode_scale=1, stride=None, stride_bound=None,
+           gradual=None):
+	engine = detection_feature(type)
+	source = frame_source.create(project, limit, video, decode_scale)
+	arrays = None
 
 	if local_sequence:
-		sequence = project.read(Project.File.shot_change_ratio)
-	else:
-		sequence = calculate_sequence(image_paths, type)
+		sequence = SequenceStore.load(project, engine.key(), source.parameters()).read(source)
+		if sequence is None:
+			sequence = project.read(Project.File.shot_change_ratio)
+		start_index = source.start_index
+	elif from_features:
+		arrays = feature_store.require(project, engine.key(), source.parameters())
+		sequence = engine.rescore(arrays, metric, bins).tolist()
+		start_index = int(arrays["startIndex"])
 		sequence and project.write(sequence, Project.File.shot_change_ratio)
+	else:
+		start_index = source.start_index
+
+		if stride and stride > 1 and coarse_to_fine_supported(source, store_features):
+			bound = stride_bound if stride_bound is not None else threshold * STRIDE_BOUND_FACTOR
+
+			sequence, decoded = features.coarse_to_fine_sequence(source, engine, stride, bound)
+			print("Decoded {} of {} frames".format(decoded, len(source)))
+			sequence and project.write(sequence, Project.File.shot_change_ratio)
+		else:
+			store = FeatureStore(engine, source.start_index, source.parameters()) if store_features else None
+
+			sequences = SequenceStore.load(project, engine.key(), source.parameters())
+			sequence = sequences.calculate(source, engine, store, workers)
+			sequence and project.write(sequence, Project.File.shot_change_ratio)
+			sequences.save()
+			store and store.save(project)
+			arrays = store and store.concatenated()
+
+	shots = extract_shots(sequence, start_index, threshold, project)
 
-	shots = extract_shots(sequence, image_paths, threshold, project)
+	if gradual is not None:
+		counts = stored_counts(project, engine, arrays, start_index, len(sequence) + 1, source.parameters())
+		if counts is not None:
+			# only sequences of stored features are rescored with another metric or coarser bins
+			rescoring = (metric, bins) if from_features else (None, None)
+			transitions = detect_transitions(sequence, counts, start_index, gradual, engine, *rescoring)
+			shots = merge_transitions(shots, transitions)
 
 	return shots
 
 
+def stored_counts(project, engine, arrays, start_index, frame_count, parameters):
+	"""The histogram counts of the frames of the sequence, loaded from the feature store if they weren't calculated
+	in this run. None if the stored counts don't cover the frames or were stored for frames with other parameters."""
+	if arrays is None:
+		arrays = feature_store.load(project, engine.key(), parameters)
+
+	if arrays is not None and "counts" not in arrays:
+		print("Gradual transitions need histogram features, {} has none".format(engine.key()))
+		return None
+
+	offset = start_index - int(arrays.get("startIndex", start_index)) if arrays is not None else -1
+	if offset < 0 or offset + frame_count > len(arrays["counts"]):
+		print("Gradual transitions need the stored features of the frames, run the detection with --store-features")
+		return None
+
+	return arrays["counts"][offset:offset + frame_count]
+
+
+def coarse_to_fine_supported(source, store_features):
+	if not source.random_access:
+		print("Coarse to fine detection needs random access to the frames, comparing all frames of the video")
+		return False
+
+	if store_features:
+		print("Coarse to fine detection doesn't calculate the features of all frames, comparing all frames")
+		return False
+
+	return True
+
+
 def simple_hist_difference(image0, image1):
 	hist0 = histogram(image0)
 	hist1 = histogram(image1)
@@ -187,66 +275,195 @@ def quadrant_hist_difference(image0, image1):
 	return avg_histogram_difference(hist0, hist1)
 
 
-def calculate_sequence(image_paths, extraction_type):
-	chds = []
+def histogram_feature(extraction_type):
+	blocks = extraction_type != ExtractionType.simpleHistogram.value
+	return HistogramEngine(RGB_CHANNEL_SIZES, blocks)
 
-	if extraction_type == ExtractionType.simpleHistogram.value:
-		diff_function = simple_hist_difference
-	else:
-		diff_function = quadrant_hist_difference
 
-	base_image = None
-	progress_bar = tqdm(total=len(image_paths), desc="shots detection")
-	for path in image_paths:
-		if base_image is not None:
-			image = load_image(path)
-			diff = diff_function(base_image, image)
+def detection_feature(extraction_type):
+	"""The feature of the extraction types whose shots are extracted from the second derivative."""
+	if extraction_type == ExtractionType.pixel.value:
+		return PixelEngine()
 
-			base_image = image
-			chds.append(diff)
-		else:
-			base_image = load_image(path)
+	return histogram_feature(extraction_type)
 
-		progress_bar.update()
-	progress_bar.close()
 
-	return chds
+def calculate_sequence(source, extraction_type, store=None, workers=1):
+	return features.calculate_sequence(source, detection_feature(extraction_type), store, workers)
 
 
-def extract_shots(distances, image_paths, threshold, project):
+def extract_shots(distances, start_index, threshold, project):
+	"""A shot ends where the second derivative of the distances rises by more than threshold. The boundary is the
+	frame in the center of the window of three derivative values."""
 	uplot.plot("plot_detection_histogram", [distances], project=project, store=True)
 	distances = convert_to_second_derivative(distances)
 	uplot.plot("plot_second_derivative", [distances], project=project, store=True)
 
-	file_index = extract_index(image_paths[0])
-	last_shot_index = file_index - 1
-	relative = file_index - 1
+	if len(distances) < 3:
+		return []
 
-	shots = []
+	first, candidates, scores, end = boundary_candidates(distances, start_index)
+	boundaries = candidates[scores > threshold]
 
-	windows = list(window(zip(distances, image_paths), 3))
-	last_index = len(windows) - 1
+	start_indices = [first] + boundaries.tolist()
+	end_indices = boundaries.tolist() + [end]
+	relative_diffs = distances[boundaries - start_index].tolist() + [float(distances[-2])]
 
-	progress_bar = tqdm(total=len(distances), desc="shots extraction")
-	for i, ((t1_d, p1), (t2_d, p2), (t3_d, p3)) in enumerate(windows):
-		actual_index = relative + i + 2  # center of the window
+	bounds = zip(start_indices, end_indices, relative_diffs)
 
-		prev_diff = abs(t1_d - t2_d)
+	return [Shot(start_index=start, end_index=end, id=i, relative_diff=diff)
+	        for i, (start, end, diff) in enumerate(bounds)]
 
-		if t1_d < t2_d and prev_diff > threshold:
-			shot = Shot(start_index=last_shot_index, end_index=actual_index, id=len(shots), relative_diff=t2_d)
-			shots.append(shot)
-			last_shot_index = actual_index
 
-		if last_index == i:
-			shot = Shot(start_index=last_shot_index, end_index=actual_index + 1, id=len(shots), relative_diff=t2_d)
-			shots.append(shot)
+def boundary_candidates(distances, start_index):
+	"""The frames which start a new shot if their score is above the threshold, for the second derivative of the
+	distances. Returns the first frame, the candidates, their scores and the end of the last shot."""
+	previous, current = distances[:-2], distances[1:-1]
+	rising = np.flatnonzero(previous < current)
+	scores = np.abs(previous - current)[rising]
 
-		progress_bar.update()
+	return start_index - 1, start_index + 1 + rising, scores, start_index - 1 + len(distances)
 
-	progress_bar.close()
 
-	return shots
+class OnlineShotDetector(object):
+	"""Detects shots in a stream of distances with the same second derivative test as extract_shots, but keeps only
+	the last values of the derivatives. A shot is emitted as soon as the distance after its end confirms the peak,
+	the last shot once the stream ends. Memory doesn't grow with the length of the movie.
+	"""
+
+	def __init__(self, threshold, start_index=1):
+		self.threshold = threshold
+		self.start_index = start_index
+
+		self.count = 0
+		self.distance = None
+		self.first = 0.0
+		self.seconds = (0.0, 0.0)
+
+		self.shot_start = start_index - 1
+		self.shot_count = 0
+
+	def push(self, distance):
+		"""Adds the distance of the next frame to its predecessor. Returns the shot ended by the peak which the
+		distance confirms or None."""
+		index = self.count
+		self.count += 1
+
+		if index == 0:
+			self.distance = distance
+			return None
+
+		first = rising(self.distance, distance)
+		second = rising(self.first, first)
+		self.distance, self.first = distance, first
+
+		previous, current = self.seconds
+		self.seconds = (current, second)
+
+		# the window of the previous, the current and the new value is complete, the current value is the center
+		if index >= 2 and previous < current and abs(previous - current) > self.threshold:
+			return self.shot(self.start_index + index - 1, current)
+
+		return None
+
+	def finish(self):
+		"""The last shot, which ends with the stream. Streams of less than three distances have no shots."""
+		if self.count < 3:
+			return None
+
+		return self.shot(self.start_index - 1 + self.count, self.seconds[0])
+
+	def shot(self, end_index, relative_diff):
+		shot = Shot(start_index=self.shot_start, end_index=end_index, id=self.shot_count, relative_diff=relative_diff)
+		self.shot_start = end_index
+		self.shot_count += 1
+
+		return shot
+
+	def detect(self, distances):
+		"""Yields the shots of the distances while they are consumed."""
+		for distance in distances:
+			shot = self.push(float(distance))
+			if shot is not None:
+				yield shot
+
+		shot = self.finish()
+		if shot is not None:
+			yield shot
+
+	def detect_frames(self, frames, feature):
+		"""Yields the shots of a frame source while the feature is calculated batch by batch."""
+		distances = (distance for _, batch in features.sequence(frames, feature) for distance in batch)
+
+		return self.detect(distances)
+
+
+def rising(previous, current):
+	"""One value of utils.derivative, the difference of both values if it rises and 0 otherwise."""
+	return current - previous if current >= previous else 0.0
+
+
+def detect_transitions(distances, counts, start_index, low_threshold, engine, metric=None, bins=None):
+	"""Twin comparison on the stored histogram counts of the frames, which have one row more than the distances.
+
+	Runs of consecutive distances above low_threshold are candidate windows, their distances are accumulated with one
+	cumulative sum. A window is a gradual transition if it is long enough, no single distance makes up most of the
+	accumulated distance and the counts of the frames before and after it differ by more than GRADUAL_DISTANCE.
+	"""
+	distances = np.asarray(distances, dtype=np.float64)
+	starts, ends = candidate_windows(distances > low_threshold, GRADUAL_GAP)
+	if not len(starts):
+		return []
+
+	accumulated = np.concatenate(([0.0], np.cumsum(distances)))
+	scores = accumulated[ends] - accumulated[starts]
+	largest = np.maximum.reduceat(distances, starts)
+	differences = engine.pair_distances(counts[starts], counts[ends], metric, bins)
+
+	gradual = (ends - starts >= GRADUAL_MIN_LENGTH) & (largest <= scores * GRADUAL_CUT_SHARE) & \
+	          (differences > GRADUAL_DISTANCE)
+
+	# the distance at offset i compares the frames start_index - 1 + i and start_index + i
+	return [Transition(Transition.gradual, start_index + int(start), start_index - 1 + int(end), float(score))
+	        for start, end, score in zip(starts[gradual], ends[gradual], scores[gradual])]
+
+
+def candidate_windows(mask, gap):
+	"""Start and end offsets, the end exclusive, of the runs of the mask. Runs which are separated by at most gap
+	values are merged."""
+	padded = np.concatenate(([False], mask, [False]))
+	changes = np.flatnonzero(padded[1:] != padded[:-1])
+	starts, ends = changes[::2], changes[1::2]
+	if not len(starts):
+		return starts, ends
+
+	separated = starts[1:] - ends[:-1] > gap
+	return starts[np.concatenate(([True], separated))], ends[np.concatenate((separated, [True]))]
+
+
+def merge_transitions(shots, transitions):
+	"""The shots with a typed transition at the start of every shot but the first one. A shot which follows a gradual
+	transition starts with its last frame, cuts within a gradual transition are removed."""
+	if not shots:
+		return shots
+
+	boundaries = [(transition.end_index, None, transition) for transition in transitions]
+	for shot in shots[1:]:
+		within = any(transition.start_index - GRADUAL_CUT_TOLERANCE <= shot.start_index <=
+		             transition.end_index + GRADUAL_CUT_TOLERANCE for transition in transitions)
+		if not within:
+			transition = Transition(Transition.cut, shot.start_index, shot.start_index)
+			boundaries.append((shot.start_index, shot.start_diff, transition))
+
+	first, end = shots[0].start_index, shots[-1].end_index
+	boundaries = sorted((boundary for boundary in boundaries if first < boundary[0] < end), key=lambda b: b[0])
+
+	merged = [Shot(start_index=first, id=0, relative_diff=shots[0].start_diff)]
+	for index, relative_diff, transition in boundaries:
+		merged.append(Shot(start_index=index, id=len(merged), relative_diff=relative_diff, transition=transition))
+
+	return [Shot(shot.start_index, following.start_index, shot.id, shot.start_diff, shot.transition)
+	        for shot, following in zip(merged, merged[1:] + [Shot(start_index=end)])]
 
 
 def adaptive_threshold(distances):
@@ -277,8 +494,29 @@ class Keyframe(object):
 		self.labels = None
 
 
+class Transition(Model):
+	"""The frames from start_index to end_index, both inclusive, in which one shot changes into the next one."""
+
+	cut = "cut"
+	gradual = "gradual"
+
+	def __init__(self, type, start_index, end_index, score=None):
+		self.type = type
+		self.start_index = start_index
+		self.end_index = end_index
+		self.score = score
+
+	@classmethod
+	def from_dict(cls, data, from_camel=True):
+		d = Model.from_dict(data, from_camel)
+		return cls(d.get("type"), d.get("start_index"), d.get("end_index"), d.get("score"))
+
+	def __repr__(self):
+		return "{} {}-{}".format(self.type, self.start_index, self.end_index)
+
+
 class Shot(Model):
-	def __init__(self, start_index=None, end_index=None, id=None, relative_diff=None):
+	def __init__(self, start_index=None, end_index=None, id=None, relative_diff=None, transition=None):
 		if end_index:
 			self.keyframe = Keyframe(start_index)
 			self.end_index = end_index
@@ -292,6 +530,7 @@ class Shot(Model):
 		self.start_index = start_index
 		self.id = id
 		self.start_diff = relative_diff
+		self.transition = transition
 
 	def as_dict(self, camel=True):
 		d = Model.as_dict(self)
@@ -309,6 +548,9 @@ class Shot(Model):
 		d = Model.from_dict(data, from_camel)
 		shot = Shot(d.get("start_index"), d.get("end_index"), d.get("id"), d.get("relative_diff"))
 
+		if d.get("transition") is not None:
+			shot.transition = Transition.from_dict(d["transition"], from_camel=False)
+
 		if "labels" in d["keyframe"] and d["keyframe"]["labels"] is not None:
 			shot.keyframe.labels = [Label.from_dict(l) for l in (d["keyframe"]["labels"])]
 
@@ -347,37 +589,65 @@ class Label(Model):
 
 
 def copy_keyframes(project, _shots):
+	store_path = project.folder_path(Project.Folder.frame_store)
+	if FrameStore.exists(store_path):
+		write_keyframes(project, _shots, FrameStore(store_path))
+		return
+
 	key_frames_file_names = [image_filename(shot.keyframe.index) for shot in _shots]
 	copy_keyframe = lambda file_name: copy2(join(project.folder_path(Project.Folder.frames), file_name),
 	                                        join(project.folder_path(Project.Folder.keyframes), file_name))
 	[copy_keyframe(file_name) for file_name in key_frames_file_names]
 
 
+def extract_keyframes(project, _shots, src):
+	"""Seeks to the keyframes in the source video, so the frames don't have to be split beforehand."""
+	frames = frame_source.VideoReader(src)
+
+	with ThreadPoolExecutor() as executor:
+		write_keyframes(project, _shots, frames, executor.map)
+
+
+def write_keyframes(project, _shots, frames, map_function=map):
+	keyframes_path = project.folder_path(Project.Folder.keyframes)
+
+	def write_keyframe(shot):
+		index = shot.keyframe.index
+		cv2.imwrite(join(keyframes_path, image_filename(index)), frames[index])
+
+	list(map_function(write_keyframe, _shots))
+
+
 ####################################################################
 # spatio temporal slices
 
 
 def write_spatio_temporal_slices(project, shots):
+	reader = frame_source.reader(project)
+
+	# one prefetcher for all shots, so loading continues into the next shot while a slice is written
+	indices = [index for shot in shots for index in range(shot.start_index, shot.end_index)]
+	prefetcher = Prefetcher(reader.__getitem__, indices)
+	frames = iter(prefetcher)
+
 	progress_bar = tqdm(total=len(shots), desc="spatio temporal slices")
 	for shot in shots:
-		slices = calculate_patio_temporal_slice(project.folder_path(Project.Folder.frames), shot)
+		slices = calculate_patio_temporal_slice(islice(frames, shot.end_index - shot.start_index))
 		vis = np.concatenate(slices, axis=1)
 
 		filename = image_filename(shot.id)
 		path = os.path.join(project.folder_path(Project.Folder.spatio), filename)
 		cv2.imwrite(path, vis)
+		progress_bar.set_postfix(prefetcher.stats(), refresh=False)
 		progress_bar.update()
 
 	progress_bar.close()
 
 
-def calculate_patio_temporal_slice(base_path, shot):
+def calculate_patio_temporal_slice(frames):
+	"""The center columns of the frames of a shot, each resized to a height of 50px."""
 	cropped_images = []
-	for index in range(shot.start_index, shot.end_index):
-		filename = image_filename(index)
-		path = join(base_path, filename)
-		image = cv2.imread(path)
-
+	for image in frames:
 		shape = image.shape
 		y = 0
 		x = shape[1] // 2
@@ -397,7 +667,7 @@ def calculate_patio_temporal_slice(base_path, shot):
 
 def keyframe_thumbnails(project):
 	keyframes_path = project.folder_path(Project.Folder.keyframes)
-	keyframe_paths = sorted(glob.glob(keyframes_path + "/*.jpg"))
+	keyframe_paths = manifest.paths(keyframes_path)
 
 	if len(keyframe_paths) == 0:
 		return None
@@ -415,7 +685,7 @@ def keyframe_thumbnails(project):
 
 def keyframe_thumbnail_size(project):
 	path = project.file_path(Project.Folder.keyframe_thumbnails)
-	keyframe_thumbnails_path = sorted(glob.glob(path + "/*.jpg"))
+	keyframe_thumbnails_path = manifest.paths(path)
 
 	if len(keyframe_thumbnails_path) == 0:
 		return None
@@ -434,7 +704,7 @@ KEYFRAME_MONTAGE_COLUMNS = 10
 
 def keyframe_montage(project):
 	keyframes_path = project.folder_path(Project.Folder.keyframes)
-	keyframe_paths = sorted(glob.glob(keyframes_path + "/*.jpg"))
+	keyframe_paths = manifest.paths(keyframes_path)
 
 	if len(keyframe_paths) == 0:
 		return None
@@ -458,7 +728,7 @@ def montage_keyframe_size(project):
 		return None
 
 	keyframes_path = project.folder_path(Project.Folder.keyframes)
-	keyframe_paths = sorted(glob.glob(keyframes_path + "/*.jpg"))
+	keyframe_paths = manifest.paths(keyframes_path)
 
 	if len(keyframe_paths) == 0:
 		return None
@@ -473,7 +743,7 @@ def montage_keyframe_size(project):
 
 def keyframe_size(project):
 	keyframes_path = project.folder_path(Project.Folder.keyframes)
-	keyframe_paths = sorted(glob.glob(keyframes_path + "/*.jpg"))
+	keyframe_paths = manifest.paths(keyframes_path)
 
 	if len(keyframe_paths) == 0:
 		return None
@@ -1,15 +1,154 @@
+import math
 import os
+import shutil
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import ffmpy
 
+from analyzer import frame_store
+from analyzer import path_utils
+from analyzer.constants import FRAME_RATE, FRAME_WIDTH
+from analyzer.frame_source import VideoStream, probe
+
+# a fixed quantizer encodes every jpg on its own, the rate control of mjpeg would depend on the frames encoded before.
+# 2 to 31 go from the best quality and largest files to the worst quality and smallest files
+JPEG_QUALITY = 6
+
+
+def split(src, dest, jobs=1, proxy_dest=None, proxy_width=None, quality=JPEG_QUALITY):
+	"""Splits the movie into jpg frames with the quantizer quality. If a proxy width is given, the same decode also
+	writes a second set of frames scaled to proxy_width into proxy_dest."""
+	check_source(src)
+
+	# the frames are written to folders next to dest and proxy_dest, which replace them only once ffmpeg succeeded, so
+	# a failed split keeps the frames of an earlier split. The changed folder tells the manifest and the stored
+	# sequences. The detectors prefer proxy frames, so proxies of an earlier split are removed even if no new ones
+	# are written
+	staged_dest = staging_directory(dest)
+	staged_proxy_dest = staging_directory(proxy_dest) if proxy_dest is not None and proxy_width else None
+
+	try:
+		split_frames(src, staged_dest, jobs, staged_proxy_dest, proxy_width, quality)
+
+		replace_directory(staged_dest, dest)
+		if staged_proxy_dest is not None:
+			replace_directory(staged_proxy_dest, proxy_dest)
+		elif proxy_dest is not None:
+			create_directories(proxy_dest)
+			path_utils.delete_files_in_folder(proxy_dest)
+	finally:
+		for path in (staged_dest, staged_proxy_dest):
+			if path is not None and os.path.exists(path):
+				shutil.rmtree(path)
+
+
+def split_frames(src, dest, jobs=1, proxy_dest=None, proxy_width=None, quality=JPEG_QUALITY):
+	if jobs > 1:
+		_, _, fps, duration = probe(src)
 
-def split(src, dest):
-	if not os.path.exists(dest):
-		os.makedirs(dest)
+		# ffmpeg's frame rate conversion depends on the frames seen before, segments would drift from a serial split
+		if abs(fps - FRAME_RATE) < 0.01 and duration > 0:
+			split_segments(src, dest, int(round(duration * FRAME_RATE)), jobs, proxy_dest, proxy_width, quality)
+			return
 
+		if duration > 0:
+			print("Source has {:.3f} fps instead of {}, splitting serially".format(fps, FRAME_RATE))
+		else:
+			print("The length of the source is unknown, splitting serially")
+
+	global_options, outputs = frame_outputs(dest, proxy_dest, proxy_width, quality=quality)
 	ff = ffmpy.FFmpeg(
+		global_options=global_options,
 		inputs={src: None},
-		outputs={dest + "/%010d.jpg": '-f image2 -r 25 -vf scale=512:-1'}
+		outputs=outputs
 	)
 
 	ff.run()
 
+
+def split_segments(src, dest, frame_count, jobs, proxy_dest=None, proxy_width=None, quality=JPEG_QUALITY):
+	"""Runs one ffmpeg process per time range. Each process numbers its files starting at the first frame of its
+	range, so the segments add up to the same sequence as a serial split."""
+	segment_length = int(math.ceil(frame_count / jobs))
+
+	commands = []
+	for start in range(0, frame_count, segment_length):
+		input_options = "-ss {:.6f}".format(start / FRAME_RATE) if start else None
+		options = "-start_number {}".format(start + 1)
+
+		if start + segment_length < frame_count:
+			options += " -frames:v {}".format(segment_length)
+
+		global_options, outputs = frame_outputs(dest, proxy_dest, proxy_width, options, quality)
+		commands.append(ffmpy.FFmpeg(
+			global_options="-v error " + global_options,
+			inputs={src: input_options},
+			outputs=outputs
+		))
+
+	with ThreadPoolExecutor(max_workers=jobs) as executor:
+		futures = [executor.submit(command.run) for command in commands]
+		[future.result() for future in futures]
+
+
+def frame_outputs(dest, proxy_dest=None, proxy_width=None, options=None, quality=JPEG_QUALITY):
+	"""Returns the global options and the outputs of a split. Both resolutions are scaled from one decode through
+	ffmpeg's split filter."""
+	image_options = "-f image2 -r {} -q:v {}".format(FRAME_RATE, quality)
+	if options:
+		image_options += " " + options
+
+	if proxy_dest is None:
+		scale = "-vf scale={}:-1".format(FRAME_WIDTH)
+		return "", {dest + "/%010d.jpg": "{} {}".format(image_options, scale)}
+
+	filter_graph = "[0:v]split=2[a][b];[a]scale={}:-1[full];[b]scale={}:-1[proxy]".format(FRAME_WIDTH, proxy_width)
+
+	outputs = OrderedDict()
+	outputs[dest + "/%010d.jpg"] = "-map [full] " + image_options
+	outputs[proxy_dest + "/%010d.jpg"] = "-map [proxy] " + image_options
+
+	return "-filter_complex {}".format(filter_graph), outputs
+
+
+def check_source(src):
+	"""Raises an exception if the source doesn't exist or can't be opened."""
+	if not src or not os.path.exists(src):
+		raise Exception("Could not find video {}".format(src))
+
+	probe(src)
+
+
+def staging_directory(path):
+	"""An empty folder next to path, which is on the same file system and can be renamed to path. A folder left by an
+	interrupted split is removed."""
+	path = os.path.normpath(path)
+	staged = os.path.join(os.path.dirname(path), ".{}.split".format(os.path.basename(path)))
+
+	if os.path.exists(staged):
+		shutil.rmtree(staged)
+	os.makedirs(staged)
+
+	return staged
+
+
+def replace_directory(src, dest):
+	if os.path.exists(dest):
+		shutil.rmtree(dest)
+
+	os.rename(src, dest)
+
+
+def create_directories(*paths):
+	for path in paths:
+		if path is not None and not os.path.exists(path):
+			os.makedirs(path)
+
+
+def split_to_store(src, dest):
+	"""Writes the downscaled frames as chunked .npy files which can be memory mapped by the detectors."""
+	check_source(src)
+
+	stream = VideoStream(src)
+	frame_store.write(stream, dest, stream.fps)
@@ -0,0 +1,106 @@
+import csv
+import json
+from collections import OrderedDict
+
+import numpy as np
+
+from analyzer import detectors
+from analyzer import edge_detection
+from analyzer import frame_source
+from analyzer import shot_detection
+from analyzer.benchmark import boundary_accuracy
+from analyzer.constants import FRAME_RATE
+from analyzer.project import Project
+from analyzer.utils import derivative
+
+
+def run(project, extraction_type, sweep_range, limit=None, video=None, reference_path=None, output_path=None):
+	"""Evaluates the thresholds of the sweep range on the stored shot change ratio and writes the results to
+	output_path, DATA_DIR/<project>/threshold_sweep.json by default."""
+	distances = project.read(Project.File.shot_change_ratio)
+	start_index = frame_source.create(project, limit, video).start_index
+	reference = read_reference(reference_path) if reference_path else None
+
+	results = sweep(distances, start_index, extraction_type, thresholds(*sweep_range), reference)
+	write(results, output_path or project.file_path(Project.File.threshold_sweep))
+
+	return results
+
+
+def thresholds(start, stop, step):
+	"""The thresholds from start to stop, both inclusive."""
+	count = int(np.floor((stop - start) / step + 1e-9)) + 1
+	return [round(start + i * step, 10) for i in range(max(count, 0))]
+
+
+def boundary_candidates(distances, start_index, extraction_type):
+	"""The derivative is calculated once, every threshold only selects the candidates with a higher score."""
+	if extraction_type in detectors.EDGE_TYPES:
+		distances = derivative(distances)
+		if not len(distances):
+			return None
+
+		return edge_detection.boundary_candidates(distances, start_index)
+
+	distances = shot_detection.convert_to_second_derivative(distances)
+	if len(distances) < 3:
+		return None
+
+	return shot_detection.boundary_candidates(distances, start_index)
+
+
+def sweep(distances, start_index, extraction_type, threshold_values, reference=None):
+	"""Shot count, average and median shot length in seconds for every threshold, the same shots extract_shots of
+	the extraction type would detect. With a reference the precision and recall of the boundaries are added."""
+	candidates = boundary_candidates(distances, start_index, extraction_type)
+
+	results = []
+	for threshold in threshold_values:
+		result = OrderedDict([("threshold", threshold), ("shots", 0), ("asl", None), ("msl", None)])
+
+		if candidates is not None:
+			first, frames, scores, end = candidates
+			boundaries = frames[scores > threshold]
+			lengths = np.diff(np.concatenate(([first], boundaries, [end]))) / FRAME_RATE
+
+			result.update(shots=len(lengths), asl=round(float(lengths.mean()), 3),
+			              msl=round(float(np.median(lengths)), 3))
+		else:
+			boundaries = np.zeros(0)
+
+		if reference is not None:
+			precision, recall = boundary_accuracy(boundaries.tolist(), reference)
+			result.update(precision=round(precision, 4), recall=round(recall, 4))
+
+		results.append(result)
+
+	return results
+
+
+def read_reference(path):
+	"""Cut list of the frames which start a new shot. Either a json list of frame indices, a shots.json or a text
+	file with one frame index per line."""
+	with open(path) as data:
+		if not path.endswith(".json"):
+			return [int(line) for line in data if line.strip()]
+
+		cuts = json.load(data)
+
+	if cuts and isinstance(cuts[0], dict):
+		return [shot["startIndex"] for shot in cuts[1:]]
+
+	return [int(cut) for cut in cuts]
+
+
+def write(results, path):
+	"""Writes the results as csv if the path ends with .csv, as json otherwise."""
+	if not path.endswith(".csv"):
+		with open(path, "w") as outfile:
+			json.dump(results, outfile, indent=4)
+		return
+
+	columns = list(results[0].keys()) if results else []
+	with open(path, "w", newline="") as outfile:
+		writer = csv.DictWriter(outfile, fieldnames=columns)
+		writer.writeheader()
+		writer.writerows(results)
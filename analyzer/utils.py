@@ -4,6 +4,7 @@ from os import getenv
 from os.path import join, dirname, splitext
 
 
+import numpy as np
 from dotenv import load_dotenv
 
 from itertools import islice
@@ -32,6 +33,16 @@ def window(seq, n=2):
 		yield result
 
 
+def batches(seq, n):
+	"""Returns lists of n consecutive elements of the iterable, the last list may be shorter"""
+	it = iter(seq)
+	while True:
+		result = list(islice(it, n))
+		if not result:
+			return
+		yield result
+
+
 def block_shaped(image, n_rows, n_cols):
 	image_height, image_width, _ = image.shape
 
@@ -195,21 +206,16 @@ def slice_paths(paths, limit):
 
 
 def derivative(distances):
-	windows = window(distances)
-	derivative_distances = []
-
-	for i, (d1, d2) in enumerate(windows):
-		if i == 0:
-			derivative_distances.append(0.0)
-
-		if d2 >= d1:
-			derivative_distances.append(d2 - d1)
-		else:
-			derivative_distances.append(0.0)
+	"""The rising differences of consecutive distances, falling differences are 0. Starts with a 0 for the first
+	distance, so the result has the same length as distances if there are at least two of them."""
+	distances = np.asarray(distances, dtype=np.float64)
+	if len(distances) < 2:
+		return np.zeros(0)
 
-	distances.insert(0, 0)
+	previous, current = distances[:-1], distances[1:]
+	rising = np.where(current >= previous, current - previous, 0.0)
 
-	return derivative_distances
+	return np.concatenate(([0.0], rising))
 
 
 def crop_image(image, cx=20, cy=20):
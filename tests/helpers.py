@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+import subprocess
+from os.path import join
+
+import cv2
+import numpy as np
+
+
+def generate_video(folder, name="clip.mp4", frames=50, size=(128, 72), fps=25, codec="libx264"):
+	"""A test pattern video with a frame counter, every frame differs from the others."""
+	path = join(folder, name)
+	source = "testsrc=size={}x{}:rate={}".format(size[0], size[1], fps)
+
+	subprocess.check_call(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i", source, "-frames:v", str(frames),
+	                       "-c:v", codec, "-pix_fmt", "yuv420p", path])
+
+	return path
+
+
+def rectangle_frames(seed, count=8, shape=(72, 96)):
+	"""Frames with random colored rectangles on a gray background, every frame differs from the others."""
+	random = np.random.RandomState(seed)
+	height, width = shape
+
+	frames = []
+	for _ in range(count):
+		frame = np.full((height, width, 3), 40, dtype=np.uint8)
+		for _ in range(4):
+			x, y = random.randint(0, width - 16), random.randint(0, height - 12)
+			cv2.rectangle(frame, (x, y), (x + 15, y + 10), tuple(int(c) for c in random.randint(0, 256, 3)), -1)
+		frames.append(frame)
+
+	return frames
+
+
+class Frames(list):
+	"""Decoded frames as a frame source, counting the frames which are read by iterating over it."""
+
+	def __init__(self, frames, random_access=True):
+		super().__init__(frames)
+		self.random_access = random_access
+		self.decoded = 0
+
+	def __iter__(self):
+		for frame in super().__iter__():
+			self.decoded += 1
+			yield frame
+
+	def sample(self, offsets):
+		return [self[offset] for offset in offsets]
+
+	def stats(self):
+		return {}
@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+import unittest
+from os.path import join
+
+import cv2
+import numpy as np
+
+from analyzer.benchmark import boundary_accuracy
+from analyzer.frame_source import ImageFolder
+
+
+class BoundaryAccuracyTest(unittest.TestCase):
+	"""Some test case"""
+
+	def test_equal(self):
+		assert boundary_accuracy([10, 20, 30], [10, 20, 30]) == (1.0, 1.0)
+
+	def test_tolerance(self):
+		assert boundary_accuracy([11, 19, 32], [10, 20, 30]) == (2 / 3, 2 / 3)
+
+	def test_matched_once(self):
+		assert boundary_accuracy([10, 11], [10]) == (0.5, 1.0)
+
+	def test_no_boundaries(self):
+		assert boundary_accuracy([], []) == (1.0, 1.0)
+		assert boundary_accuracy([], [10]) == (0.0, 0.0)
+
+
+class DecodeScaleTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, path)
+		self.image_path = join(path, "0000000001.jpg")
+		cv2.imwrite(self.image_path, np.full((64, 96, 3), 128, dtype=np.uint8))
+
+	def test_reduced_size(self):
+		for scale in [1, 2, 4, 8]:
+			frame = next(iter(ImageFolder([self.image_path], scale)))
+			assert frame.shape == (64 // scale, 96 // scale, 3)
@@ -0,0 +1,34 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from analyzer import detectors
+from analyzer import edge_detection
+from analyzer import shot_detection
+from analyzer.constants import ExtractionType
+
+
+class DetectorsTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self._sut = detectors
+
+	def test_default_threshold_of_every_type(self):
+		for extraction_type in ExtractionType.__members__:
+			self.assertIn(extraction_type, self._sut.DEFAULT_THRESHOLDS)
+
+	def test_default_threshold(self):
+		self.assertEqual(0.4, self._sut.default_threshold(None))
+		self.assertEqual(0.1, self._sut.default_threshold(ExtractionType.pixel.value))
+		self.assertEqual(0.7, self._sut.default_threshold(ExtractionType.pixel.value, 0.7))
+		self.assertEqual(0, self._sut.default_threshold(ExtractionType.edge.value, 0))
+
+	def test_shot_extraction(self):
+		self.assertIs(edge_detection.extract_shots, self._sut.shot_extraction(ExtractionType.hybrid.value))
+		self.assertIs(edge_detection.extract_shots, self._sut.shot_extraction(ExtractionType.edgeim.value))
+		self.assertIs(shot_detection.extract_shots, self._sut.shot_extraction(ExtractionType.pixel.value))
+		self.assertIs(shot_detection.extract_shots, self._sut.shot_extraction(None))
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import pickle
+import unittest
+
+import cv2
+import numpy as np
+
+from analyzer import edge_detection
+from analyzer import features
+from analyzer.edge_engine import EdgeEngine, edge_change_ratios
+from tests.helpers import rectangle_frames
+
+
+class EdgeEngineTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self._sut = EdgeEngine()
+		self._sut.batch_size = 3
+		self.frames = rectangle_frames(5)
+
+	def expected_counts(self):
+		maps = []
+		for frame in self.frames:
+			_, _, edges = edge_detection.calculate_edges(edge_detection.convert_image(frame))
+			maps.append((edges, circles(edges)))
+
+		return [(edge_detection.count_in_out_edges(edges0, dilated1), edge_detection.count_in_out_edges(edges1, dilated0),
+		         np.count_nonzero(edges0), np.count_nonzero(edges1))
+		        for (edges0, dilated0), (edges1, dilated1) in zip(maps, maps[1:])]
+
+	def test_dilation(self):
+		edges = (np.random.RandomState(1).rand(40, 50) > 0.97).astype(np.uint8) * 255
+
+		assert np.array_equal(edge_detection.dilate_edges(edges), circles(edges))
+
+	def test_counts(self):
+		counts = []
+		for _, batch in features.sequence(self.frames, _CountingEngine()):
+			counts.extend(tuple(row) for row in batch.tolist())
+
+		assert counts == self.expected_counts()
+
+	def test_sequence(self):
+		distances = []
+		for _, batch in features.sequence(self.frames, self._sut):
+			distances.extend(batch.tolist())
+
+		assert distances == edge_change_ratios(self.expected_counts()).tolist()
+
+	def test_pickle_after_use(self):
+		self._sut.extract(self.frames[:2])
+		engine = pickle.loads(pickle.dumps(self._sut))
+
+		assert engine.equalizer is None
+		assert engine.extract(self.frames[:2]).shape == (2, 2, 72, 96)
+
+
+class _CountingEngine(EdgeEngine):
+	batch_size = 3
+
+	def score(self, comparisons):
+		return comparisons
+
+
+def circles(edges, radius=5):
+	dilated = np.zeros_like(edges)
+	for y, x in zip(*np.nonzero(edges)):
+		cv2.circle(dilated, (int(x), int(y)), radius, 255, -1)
+
+	return dilated
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import numpy as np
+
+from analyzer import detectors
+from analyzer import ensemble
+from analyzer import features
+from analyzer.constants import ExtractionType
+from analyzer.ensemble import EnsembleFeature
+from tests.helpers import Frames, rectangle_frames
+
+
+class EnsembleTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		types = [ExtractionType.histogram.value, ExtractionType.edge.value, ExtractionType.pixel.value]
+		self.features = [detectors.feature(extraction_type) for extraction_type in types]
+		self._sut = EnsembleFeature(self.features)
+		self._sut.batch_size = 3
+		self.frames = rectangle_frames(4)
+
+	def test_sequences(self):
+		rows = np.asarray(features.calculate_sequence(Frames(self.frames), self._sut))
+
+		assert rows.shape == (7, 3)
+		for i, feature in enumerate(self.features):
+			assert rows[:, i].tolist() == features.calculate_sequence(Frames(self.frames), feature)
+
+	def test_fused_shots(self):
+		score = np.array([0, 0, 1, 0, 0.5, 0.25, 0, 0])
+		shots = ensemble.fused_shots(score, 11, 0.5)
+
+		assert [(shot.start_index, shot.end_index) for shot in shots] == [(10, 12), (12, 14), (14, 17)]
+		assert shots[1].start_diff == 1.0
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from analyzer import edge_detection, features, shot_detection
+from analyzer.histogram_engine import HistogramEngine
+from analyzer.shot_detection import OnlineShotDetector, Shot, Transition
+from analyzer.utils import derivative
+
+
+class DerivativeTest(unittest.TestCase):
+	"""Some test case"""
+
+	def test_rising_differences(self):
+		assert derivative([1.0, 3.0, 2.0, 2.5]).tolist() == [0.0, 2.0, 0.0, 0.5]
+
+	def test_short(self):
+		assert derivative([]).tolist() == []
+		assert derivative([1.0]).tolist() == []
+
+	def test_input_unchanged(self):
+		distances = [1.0, 3.0, 2.0]
+		derivative(distances)
+
+		assert distances == [1.0, 3.0, 2.0]
+
+
+@mock.patch("analyzer.plot.plot")
+class ExtractShotsTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.distances = [0.1, 0.1, 0.9, 0.1, 0.1, 0.1]
+
+	def test_histogram_boundaries(self, plot):
+		shots = shot_detection.extract_shots(self.distances, 1, 0.4, None)
+
+		assert [(shot.start_index, shot.end_index) for shot in shots] == [(0, 3), (3, 6)]
+		assert [shot.id for shot in shots] == [0, 1]
+		self.assertAlmostEqual(shots[0].start_diff, 0.8)
+
+	def test_histogram_start_index(self, plot):
+		shots = shot_detection.extract_shots(self.distances, 11, 0.4, None)
+
+		assert [(shot.start_index, shot.end_index) for shot in shots] == [(10, 13), (13, 16)]
+
+	def test_histogram_too_short(self, plot):
+		assert shot_detection.extract_shots([0.1, 0.9], 1, 0.4, None) == []
+
+	def test_edge_boundaries(self, plot):
+		shots = edge_detection.extract_shots(self.distances, 1, 0.5, None)
+
+		assert [(shot.start_index, shot.end_index) for shot in shots] == [(1, 3), (3, 6)]
+		assert [shot.start_diff for shot in shots] == [0, 0]
+
+
+@mock.patch("analyzer.plot.plot")
+class OnlineShotDetectorTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self._sut = OnlineShotDetector(0.4, start_index=1)
+
+	def test_same_shots(self, plot):
+		distances = np.random.RandomState(7).rand(500).tolist()
+
+		expected = [shot.as_dict() for shot in shot_detection.extract_shots(distances, 1, 0.4, None)]
+		shots = [shot.as_dict() for shot in self._sut.detect(distances)]
+
+		assert shots == expected
+
+	def test_emits_early(self, plot):
+		shots = [self._sut.push(distance) for distance in [0.1, 0.1, 0.9, 0.1]]
+
+		assert shots[:3] == [None, None, None]
+		assert (shots[3].start_index, shots[3].end_index) == (0, 3)
+		last_shot = self._sut.finish()
+		assert (last_shot.start_index, last_shot.end_index) == (3, 4)
+
+	def test_frames(self, plot):
+		random = np.random.RandomState(8)
+		frames = [random.randint(0, 256, size=(16, 16, 3)).astype(np.uint8) for _ in range(40)]
+		feature = shot_detection.histogram_feature("histogram")
+
+		distances = [float(distance) for _, batch in features.sequence(frames, feature) for distance in batch]
+		expected = [shot.as_dict() for shot in shot_detection.extract_shots(distances, 1, 0.4, None)]
+		shots = [shot.as_dict() for shot in self._sut.detect_frames(frames, feature)]
+
+		assert shots == expected
+
+
+class GradualTransitionTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.engine = HistogramEngine([(2, [0, 256])] * 3)
+
+		first, second, third = np.zeros((3, 4, 8))
+		first[:, 0], second[:, 5], third[:, 7] = 100, 100, 100
+
+		# a dissolve from the frame 20 to the frame 30 and a cut at the frame 45
+		weights = np.clip((np.arange(60) - 20) / 10.0, 0, 1)[:, None, None]
+		self.counts = (1 - weights) * first + weights * second
+		self.counts[45:] = third
+
+		histograms = self.counts / np.sqrt((self.counts ** 2).sum(axis=-1, keepdims=True))
+		self.distances = np.sqrt(((histograms[1:] - histograms[:-1]) ** 2).sum(axis=-1)).mean(axis=-1)
+
+	def test_dissolve(self):
+		transitions = shot_detection.detect_transitions(self.distances, self.counts, 1, 0.05, self.engine)
+
+		assert [(t.type, t.start_index, t.end_index) for t in transitions] == [(Transition.gradual, 21, 30)]
+
+	def test_candidate_windows(self):
+		mask = np.array([False, True, True, False, False, True, False, False, False, True])
+		starts, ends = shot_detection.candidate_windows(mask, 2)
+
+		assert starts.tolist() == [1, 9]
+		assert ends.tolist() == [6, 10]
+
+	def test_no_candidate_windows(self):
+		starts, ends = shot_detection.candidate_windows(np.zeros(10, dtype=bool), 2)
+
+		assert starts.tolist() == [] and ends.tolist() == []
+		assert shot_detection.detect_transitions(self.distances, self.counts, 1, 2.0, self.engine) == []
+
+	def test_merge_transitions(self):
+		shots = [Shot(0, 22, 0), Shot(22, 26, 1), Shot(26, 45, 2), Shot(45, 60, 3)]
+		transitions = [Transition(Transition.gradual, 21, 30, 1.2)]
+
+		merged = shot_detection.merge_transitions(shots, transitions)
+
+		assert [(shot.start_index, shot.end_index, shot.id) for shot in merged] == [(0, 30, 0), (30, 45, 1),
+		                                                                         (45, 60, 2)]
+		assert [shot.transition.type for shot in merged[1:]] == [Transition.gradual, Transition.cut]
+		assert merged[0].transition is None
@@ -0,0 +1,92 @@
+# -*- coding: utf-8 -*-
+import pickle
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from analyzer import feature_store
+from analyzer.feature_store import FeatureStore
+
+
+class FeatureStoreTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self._sut = FeatureStore(_Feature(), 5, {"source": "frames", "frames": [30, 12]})
+
+		random = np.random.RandomState(6)
+		self.batches = [random.randint(0, 1000, size=(n, 4, 8)).astype(np.uint32) for n in (3, 5, 1)]
+
+	def test_compact(self):
+		for batch in self.batches:
+			self._sut.append({"counts": batch})
+
+		counts = self._sut.concatenated()["counts"]
+
+		assert counts.dtype == np.uint16
+		assert np.array_equal(counts, np.concatenate(self.batches))
+
+	def test_widen(self):
+		large = np.full((2, 4, 8), 70000, dtype=np.uint32)
+		for batch in self.batches[:2] + [large]:
+			self._sut.append({"counts": batch})
+
+		counts = self._sut.concatenated()["counts"]
+
+		assert counts.dtype == np.uint32
+		assert np.array_equal(counts, np.concatenate(self.batches[:2] + [large]))
+
+	def test_extend_overlapping(self):
+		self._sut.append({"counts": self.batches[0]})
+		self._sut.extend({"counts": self.batches[1]}, 4, True)
+
+		assert np.array_equal(self._sut.concatenated()["counts"], np.concatenate([self.batches[0], self.batches[1][1:]]))
+
+	def test_save(self):
+		path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, path)
+
+		for batch in self.batches:
+			self._sut.append({"counts": batch, "proxies": batch[:, 0].astype(np.uint8)})
+		self._sut.save(_Project(path))
+
+		arrays = feature_store.load(_Project(path), "test")
+
+		assert int(arrays["startIndex"]) == 5
+		assert np.array_equal(arrays["counts"], np.concatenate(self.batches))
+		assert arrays["proxies"].dtype == np.uint8
+
+	def test_other_frames(self):
+		path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, path)
+
+		self._sut.append({"counts": self.batches[0]})
+		self._sut.save(_Project(path))
+
+		assert feature_store.load(_Project(path), "test", {"source": "frames", "frames": [30, 12]}) is not None
+		assert feature_store.load(_Project(path), "test", {"source": "frames", "frames": [60, 14]}) is None
+		assert feature_store.load(_Project(path), "other", {"source": "frames", "frames": [30, 12]}) is None
+
+		with self.assertRaises(Exception):
+			feature_store.require(_Project(path), "test", {"source": "frame_store", "frames": [30, 12]})
+
+	def test_pickle(self):
+		self._sut.append({"counts": self.batches[0]})
+		counts = pickle.loads(pickle.dumps(self._sut.concatenated()))["counts"]
+
+		assert np.array_equal(counts, self.batches[0])
+
+
+class _Feature(object):
+	def key(self):
+		return "test"
+
+
+class _Project(object):
+	def __init__(self, path):
+		self.path = path
+
+	def folder_path(self, folder_type):
+		return self.path
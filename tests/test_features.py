@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from analyzer import features, frame_store, shot_detection
+from analyzer.constants import Registration
+from analyzer.edge_detection import RegisteredEdgeFeature
+from analyzer.edge_engine import EdgeEngine
+from analyzer.feature_store import FeatureStore
+from analyzer.frame_source import ImageFolder, StoredFrames
+from analyzer.frame_store import FrameStore
+from analyzer.histogram_engine import HistogramEngine
+
+
+class SegmentsTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self._sut = ImageFolder(["{:010d}.jpg".format(i) for i in range(1, 11)])
+
+	def test_overlapping_segments(self):
+		segments = self._sut.segments(3)
+
+		assert [segment.image_paths[0] for segment in segments] == ["0000000001.jpg", "0000000004.jpg", "0000000007.jpg"]
+		assert [segment.start_index for segment in segments] == [1, 4, 7]
+		assert [len(segment) for segment in segments] == [4, 4, 4]
+
+	def test_pairs_compared_once(self):
+		for count in range(1, 12):
+			pairs = []
+			for segment in self._sut.segments(count):
+				pairs.extend(zip(segment.image_paths, segment.image_paths[1:]))
+
+			assert pairs == list(zip(self._sut.image_paths, self._sut.image_paths[1:]))
+
+	def test_single_frame(self):
+		source = ImageFolder(["0000000001.jpg"])
+		assert source.segments(4) == [source]
+
+
+class ParallelSequenceTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, path)
+		random = np.random.RandomState(3)
+		frames = [random.randint(0, 256, size=(64, 96, 3)).astype(np.uint8) for _ in range(23)]
+
+		frame_store.write(frames, path, 25, chunk_size=5)
+		self._sut = StoredFrames(FrameStore(path), ("2", "23"))
+
+	def test_histogram_sequence(self):
+		feature = HistogramEngine(shot_detection.RGB_CHANNEL_SIZES)
+
+		serial_store = FeatureStore(feature, self._sut.start_index)
+		serial = features.calculate_sequence(self._sut, feature, serial_store)
+
+		parallel_store = FeatureStore(feature, self._sut.start_index)
+		parallel = features.calculate_sequence(self._sut, feature, parallel_store, workers=2)
+
+		assert parallel == serial
+		assert np.array_equal(parallel_store.concatenated()["counts"], serial_store.concatenated()["counts"])
+
+	def test_edge_sequence(self):
+		serial = features.calculate_sequence(self._sut, EdgeEngine())
+		parallel = features.calculate_sequence(self._sut, EdgeEngine(), workers=3)
+
+		assert parallel == serial
+
+	def test_registered_edge_sequence(self):
+		feature = RegisteredEdgeFeature(Registration.pyramid.value)
+
+		serial_store = FeatureStore(feature, self._sut.start_index)
+		serial = features.calculate_sequence(self._sut, feature, serial_store)
+
+		parallel_store = FeatureStore(feature, self._sut.start_index)
+		parallel = features.calculate_sequence(self._sut, feature, parallel_store, workers=2)
+
+		assert parallel == serial
+		assert np.array_equal(parallel_store.concatenated()["edgeCounts"], serial_store.concatenated()["edgeCounts"])
+
+	@mock.patch("analyzer.features.calculate_segments")
+	def test_segment_frames(self, calculate_segments):
+		feature = EdgeEngine()
+		feature.segment_frames = 2
+
+		features.calculate_sequence(self._sut, feature, workers=2)
+
+		assert len(calculate_segments.call_args[0][0]) == 11
+
+
+@mock.patch("analyzer.plot.plot")
+class CoarseToFineTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, path)
+		random = np.random.RandomState(6)
+		colors = [(200, 30, 30), (30, 200, 30), (30, 30, 200), (120, 120, 20)]
+
+		frames = []
+		for color, length in zip(colors, [37, 50, 21, 60]):
+			for _ in range(length):
+				noise = random.randint(0, 40, size=(24, 32, 3))
+				frames.append(np.clip(np.array(color) + noise, 0, 255).astype(np.uint8))
+
+		frame_store.write(frames, path, 25, chunk_size=50)
+		self._sut = StoredFrames(FrameStore(path))
+		self.feature = HistogramEngine(shot_detection.RGB_CHANNEL_SIZES)
+
+	def test_same_boundaries(self, plot):
+		expected = shot_detection.extract_shots(features.calculate_sequence(self._sut, self.feature), 1, 0.4, None)
+
+		for stride in [4, 8, 16]:
+			sequence, decoded = features.coarse_to_fine_sequence(self._sut, self.feature, stride, 0.2)
+			shots = shot_detection.extract_shots(sequence, 1, 0.4, None)
+
+			assert [shot.start_index for shot in shots] == [shot.start_index for shot in expected]
+			assert decoded < len(self._sut)
+
+	def test_runs(self, plot):
+		assert features.runs({7, 1, 2, 3, 5}) == [(1, 3), (5, 5), (7, 7)]
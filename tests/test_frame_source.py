@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import shutil
+import subprocess
+import tempfile
+import unittest
+from os.path import join
+
+import cv2
+import numpy as np
+
+from analyzer import frame_source
+from analyzer import shot_detection
+from analyzer.frame_source import VideoStream
+from analyzer.sequence_store import SequenceStore
+from tests.helpers import generate_video
+
+
+class VideoStreamTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.path)
+
+		self.src = generate_video(self.path, frames=40, size=(160, 90))
+		self._sut = VideoStream(self.src, width=64)
+
+	def test_probe(self):
+		assert frame_source.probe(self.src) == (160, 90, 25.0, 1.6)
+
+	def test_frames(self):
+		frames = list(self._sut)
+
+		assert len(self._sut) == 40
+		assert len(frames) == 40
+		assert frames[0].shape == (36, 64, 3)
+
+	def test_limit(self):
+		frames = list(self._sut)
+		limited = list(VideoStream(self.src, ("11", "20"), width=64))
+
+		assert len(limited) == 10
+		assert all(np.array_equal(frame, expected) for frame, expected in zip(limited, frames[10:20]))
+
+	def test_subrange(self):
+		frames = list(self._sut)
+		subrange = self._sut.subrange(25, 5)
+
+		assert subrange.start_index == 26 and len(subrange) == 5
+		assert all(np.array_equal(frame, expected) for frame, expected in zip(subrange, frames[25:30]))
+
+	def test_segments(self):
+		frames = list(self._sut)
+		segments = [list(segment) for segment in self._sut.segments(3)]
+
+		assert sum(len(segment) for segment in segments) == 40 + len(segments) - 1
+		assert all(np.array_equal(segment[0], frames[i * 13]) for i, segment in enumerate(segments))
+
+	def test_command(self):
+		command = self._sut.command(11, 10)
+
+		assert command[command.index("-ss") + 1] == "0.400000"
+		assert command[command.index("-frames:v") + 1] == "10"
+		assert command[command.index("-vf") + 1] == "scale=64:36"
+		assert "-ss" not in self._sut.command(1)
+
+	def test_scaled_size(self):
+		for width, height, target_width in [(160, 90, 64), (130, 74, 64), (720, 404, 512), (101, 57, 40)]:
+			path = join(self.path, "{}x{}.png".format(width, height))
+			subprocess.check_call(["ffmpeg", "-v", "error", "-y", "-f", "lavfi", "-i",
+			                       "testsrc=size={}x{}".format(width, height), "-frames:v", "1", "-vf",
+			                       "scale={}:-1".format(target_width), path])
+			scaled_height, scaled_width = cv2.imread(path).shape[:2]
+
+			assert frame_source.scaled_size(width, height, target_width) == (scaled_width, scaled_height)
+
+
+class UnknownLengthTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.path)
+
+		# raw h264 has no container duration, cv2 reports a negative frame count
+		self._sut = VideoStream(generate_video(self.path, "clip.h264", frames=30), width=64)
+
+	def test_length(self):
+		assert len(self._sut) == 0
+		assert not self._sut.exact_length
+		assert len(list(self._sut)) == 30
+
+	def test_sequence(self):
+		store = SequenceStore(join(self.path, "histogram.json"), {"source": "clip.h264"})
+		sequence = store.calculate(self._sut, shot_detection.histogram_feature("histogram"))
+
+		assert len(sequence) == 29
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from analyzer import frame_store
+from analyzer.frame_source import StoredFrames
+from analyzer.frame_store import FrameStore
+
+
+class FrameStoreTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.path)
+		self.frames = [np.full((4, 6, 3), i, dtype=np.uint8) for i in range(7)]
+
+		frame_store.write(self.frames, self.path, 25, chunk_size=3)
+		self._sut = FrameStore(self.path)
+
+	def test_header(self):
+		assert len(self._sut) == 7
+		assert self._sut.shape == (4, 6, 3)
+		assert self._sut.fps == 25
+		assert len(self._sut.chunks) == 3
+
+	def test_random_access(self):
+		for i, frame in enumerate(self.frames):
+			assert np.array_equal(self._sut[i], frame)
+
+	def test_out_of_range(self):
+		with self.assertRaises(IndexError):
+			self._sut[7]
+
+	def test_delete(self):
+		frame_store.delete(self.path)
+
+		assert not FrameStore.exists(self.path)
+		assert os.listdir(self.path) == []
+
+	def test_limited_source(self):
+		source = StoredFrames(self._sut, ("3", "5"))
+		frames = list(source)
+
+		assert source.start_index == 3
+		assert len(source) == 3
+		assert [frame[0, 0, 0] for frame in frames] == [2, 3, 4]
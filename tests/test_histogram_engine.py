@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import cv2
+import numpy as np
+
+from analyzer import features
+from analyzer import shot_detection
+from analyzer.constants import DistanceMetric
+from analyzer.histogram_engine import HistogramEngine, convert_images, rebin
+
+
+class HistogramEngineTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self._sut = HistogramEngine(shot_detection.RGB_CHANNEL_SIZES)
+
+		random = np.random.RandomState(0)
+		self.frames = [random.randint(0, 256, (36, 64, 3)).astype(np.uint8) for _ in range(5)]
+		self.frames.append(np.zeros((36, 64, 3), dtype=np.uint8))
+
+	def expected_sequence(self, difference):
+		images = [shot_detection.convert_image(frame) for frame in self.frames]
+		return [difference(i0, i1) for i0, i1 in zip(images, images[1:])]
+
+	def sequence(self, blocks):
+		self._sut.blocks = blocks
+		self._sut.batch_size = 4
+
+		distances = []
+		for frame_count, batch in features.sequence(self.frames, self._sut):
+			distances.extend(batch.tolist())
+
+		return distances
+
+	def test_histograms(self):
+		images = convert_images(self.frames)
+		block_histograms, global_histograms = self._sut.histograms(images)
+
+		for i, image in enumerate(images):
+			expected = shot_detection.quadrant_histograms(image)
+			np.testing.assert_allclose(block_histograms[i], expected, atol=1e-6)
+			np.testing.assert_allclose(global_histograms[i, 0], shot_detection.histogram(image), atol=1e-6)
+
+	def test_simple_histogram_sequence(self):
+		expected = self.expected_sequence(shot_detection.simple_hist_difference)
+
+		np.testing.assert_allclose(self.sequence(blocks=False), expected, atol=1e-6)
+
+	def test_quadrant_histogram_sequence(self):
+		expected = self.expected_sequence(shot_detection.quadrant_hist_difference)
+
+		np.testing.assert_allclose(self.sequence(blocks=True), expected, atol=1e-6)
+
+	def test_rescore_stored_counts(self):
+		images = convert_images(self.frames)
+		arrays = self._sut.arrays(self._sut.counts(images), None)
+
+		result = self._sut.rescore(arrays, chunk_size=2)
+
+		expected = self.expected_sequence(shot_detection.quadrant_hist_difference)
+		np.testing.assert_allclose(result, expected, atol=1e-6)
+
+	def test_rescore_chi_square(self):
+		images = convert_images(self.frames)
+		arrays = self._sut.arrays(self._sut.counts(images), None)
+
+		result = self._sut.rescore(arrays, DistanceMetric.chisqr.value)
+
+		histograms = [shot_detection.quadrant_histograms(image) for image in images]
+		expected = [np.mean([cv2.compareHist(b0, b1, cv2.HISTCMP_CHISQR) for b0, b1 in zip(h0, h1)])
+		            for h0, h1 in zip(histograms, histograms[1:])]
+		np.testing.assert_allclose(result, expected, rtol=1e-4)
+
+	def test_rebin(self):
+		counts = np.ones((2, 4, 512))
+
+		result = rebin(counts, (8, 8, 8), (4, 2, 8))
+
+		assert result.shape == (2, 4, 64)
+		assert np.all(result == 8)
+
+		with self.assertRaises(ValueError):
+			rebin(counts, (8, 8, 8), (3, 8, 8))
+
+	def test_odd_block_layout(self):
+		regions = self._sut.block_regions((5, 5))
+
+		assert len(regions) == 9
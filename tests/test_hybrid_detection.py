@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from analyzer import features
+from analyzer import hybrid_detection
+from analyzer.edge_engine import EdgeEngine
+from tests.helpers import Frames, rectangle_frames
+
+
+class HybridDetectionTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self._sut = EdgeEngine()
+		self._sut.batch_size = 3
+		self.frames = rectangle_frames(7, count=10)
+
+	def test_candidates(self):
+		expected = []
+		for _, batch in features.sequence(self.frames, EdgeEngine()):
+			expected.extend(batch.tolist())
+
+		candidates = [0, 3, 4, 8]
+		distances = hybrid_detection.candidate_sequence(Frames(self.frames), self._sut, candidates, len(expected))
+
+		assert len(distances) == 9
+		assert [distances[i] for i in candidates] == [expected[i] for i in candidates]
+		assert not any(distance for i, distance in enumerate(distances) if i not in candidates)
+
+	def test_only_candidate_frames(self):
+		source = Frames(self.frames, random_access=False)
+		hybrid_detection.candidate_sequence(source, self._sut, [2, 5], 9)
+
+		assert source.decoded == 7
+
+	def test_no_candidates(self):
+		distances = hybrid_detection.confirmed_sequence(Frames(self.frames), [0.01] * 9)
+
+		assert distances == [0.0] * 9
@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+import shutil
+import tempfile
+import unittest
+from os.path import join
+
+import cv2
+import numpy as np
+
+from analyzer import shot_detection
+from analyzer.frame_source import VideoStream
+from analyzer.shot_detection import Shot
+from analyzer.utils import image_filename
+from tests.helpers import generate_video
+
+
+class VideoKeyframesTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.path)
+
+		self.src = generate_video(self.path)
+		self._sut = _Project(self.path)
+
+	def test_extract_keyframes(self):
+		shots = [Shot(start, start + 5, i) for i, start in enumerate([0, 13, 37])]
+		shot_detection.extract_keyframes(self._sut, shots, self.src)
+
+		frames = list(VideoStream(self.src))
+		for shot in shots:
+			keyframe = cv2.imread(join(self.path, image_filename(shot.keyframe.index)))
+			difference = np.abs(keyframe.astype(int) - frames[shot.keyframe.index].astype(int)).mean()
+
+			# the keyframe is written as jpg, the frame of another index differs far more
+			assert difference < 3
+			assert np.abs(keyframe.astype(int) - frames[shot.keyframe.index + 1].astype(int)).mean() > difference
+
+
+class _Project(object):
+	def __init__(self, path):
+		self.path = path
+
+	def folder_path(self, folder_type):
+		return self.path
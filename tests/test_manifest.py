@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+from os.path import join
+
+from analyzer.manifest import Manifest, manifest_path
+from analyzer.utils import image_filename
+
+
+class ManifestTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		folder = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, folder)
+		self.path = join(folder, "frames")
+		os.makedirs(self.path)
+
+		for index in range(10):
+			self.touch(image_filename(index))
+		self.touch("montage.png")
+
+		self.set_folder_mtime(1000)
+
+	def touch(self, name):
+		with open(join(self.path, name), "w") as f:
+			f.write(name)
+
+	def set_folder_mtime(self, seconds):
+		os.utime(self.path, (seconds, seconds))
+
+	def test_paths(self):
+		manifest = Manifest.load(self.path)
+
+		assert len(manifest) == 10
+		assert manifest.paths()[0] == join(self.path, "0000000001.jpg")
+		assert manifest.indices == list(range(1, 11))
+
+	def test_slice(self):
+		manifest = Manifest.load(self.path)
+
+		result = manifest.slice(("3", "5"))
+
+		assert [os.path.basename(p) for p in result] == ["0000000003.jpg", "0000000004.jpg", "0000000005.jpg"]
+		assert manifest.slice((20, 30)) == []
+
+	def test_cached(self):
+		Manifest.load(self.path)
+
+		assert os.path.exists(manifest_path(self.path))
+		assert len(Manifest.load(self.path)) == 10
+
+	def test_invalidation(self):
+		Manifest.load(self.path)
+
+		self.touch(image_filename(10))
+		self.set_folder_mtime(2000)
+
+		assert len(Manifest.load(self.path)) == 11
+
+	def test_signature(self):
+		signature = Manifest.load(self.path).signature()
+
+		os.unlink(join(self.path, image_filename(9)))
+		self.touch(image_filename(9))
+		os.utime(join(self.path, image_filename(9)), ns=(0, signature[1] + 10 ** 9))
+		self.set_folder_mtime(2000)
+
+		assert Manifest.load(self.path).signature() == [10, signature[1] + 10 ** 9]
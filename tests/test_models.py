@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 import unittest
 
-from analyzer.shot_detection import Shot, Label
+from analyzer.shot_detection import Shot, Label, Transition
 from analyzer.subtitles_parser import Subtitle
 from analyzer.timestamp import Timestamp
 
@@ -52,6 +52,13 @@ class ShotModelTests(unittest.TestCase):
 
 		assert type(result) is Shot
 
+	def test_transition_from_dict(self):
+		self._sut.transition = Transition(Transition.gradual, 3, 8, 1.5)
+		result = Shot.from_dict(self._sut.as_dict())
+
+		assert result.transition.type == Transition.gradual
+		assert (result.transition.start_index, result.transition.end_index) == (3, 8)
+
 	def test_from_empty_labels_dict(self):
 		result = self._sut.as_dict()
 		assert result["keyframe"]["labels"] is None
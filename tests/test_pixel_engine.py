@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import cv2
+import numpy as np
+
+from analyzer import features
+from analyzer import shot_detection
+from analyzer.constants import ExtractionType
+from analyzer.pixel_engine import PixelEngine
+
+
+class PixelEngineTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self._sut = PixelEngine()
+		self._sut.batch_size = 3
+
+		random = np.random.RandomState(3)
+		self.frames = [random.randint(0, 256, (72, 128, 3)).astype(np.uint8) for _ in range(8)]
+
+	def expected(self):
+		proxies = [cv2.cvtColor(cv2.resize(frame, (64, 36), interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+		           for frame in self.frames]
+
+		return [np.mean(np.abs(p0.astype(float) - p1.astype(float))) / 255 for p0, p1 in zip(proxies, proxies[1:])]
+
+	def test_sequence(self):
+		distances = []
+		for _, batch in features.sequence(self.frames, self._sut):
+			distances.extend(batch.tolist())
+
+		assert np.allclose(distances, self.expected())
+
+	def test_rescore(self):
+		arrays = {"proxies": self._sut.extract(self.frames)}
+
+		assert np.allclose(self._sut.rescore(arrays), self.expected())
+
+	def test_equal_frames(self):
+		distances = self._sut.comparisons(None, self._sut.extract([self.frames[0]] * 3))
+
+		assert distances.tolist() == [0.0, 0.0]
+
+	def test_detection_feature(self):
+		feature = shot_detection.detection_feature(ExtractionType.pixel.value)
+
+		assert feature.key() == "pixel_64x36"
@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from analyzer import plot
+
+
+class LttbTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.y = np.random.RandomState(3).rand(10000) * 0.1
+		self.y[[1234, 8765]] = [1.0, 2.0]
+		self.x = np.arange(len(self.y))
+
+	def test_points(self):
+		x, y = plot.lttb(self.x, self.y, 500)
+
+		assert len(x) == 500
+		assert (x[0], x[-1]) == (0, 9999)
+		assert np.all(np.diff(x) > 0)
+
+	def test_keeps_peaks(self):
+		x, y = plot.lttb(self.x, self.y, 500)
+
+		assert 1234 in x.tolist()
+		assert 8765 in x.tolist()
+
+	def test_short_series(self):
+		x, y = plot.lttb(self.x[:10], self.y[:10], 500)
+
+		assert x.tolist() == self.x[:10].tolist()
+
+
+class PlotTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.points = plot.POINTS
+
+	def tearDown(self):
+		plot.configure(False, self.points)
+
+	@mock.patch("analyzer.plot.background")
+	def test_disabled(self, background):
+		plot.configure(False)
+		plot.plot("sut", [np.zeros(10)], project=mock.Mock(), store=True)
+
+		assert not background.called
+
+	@mock.patch("analyzer.plot.background")
+	def test_stored_in_background(self, background):
+		project = mock.Mock()
+		project.folder_path.return_value = "plots"
+
+		plot.configure(True, points=100)
+		plot.plot("sut", [np.zeros(1000)], project=project, store=True)
+
+		args = background.return_value.submit.call_args[0]
+		assert args[0] is plot.render
+		assert len(args[2][0][0]) == 100
+		assert args[4] == "plots/sut.png"
@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+import threading
+import unittest
+
+from analyzer.prefetch import Prefetcher
+
+
+class PrefetcherTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.lock = threading.Lock()
+		self.started = []
+		self._sut = Prefetcher(self.load, range(20), depth=3, threads=2)
+
+	def load(self, key):
+		with self.lock:
+			self.started.append(key)
+
+		return key * 2
+
+	def test_order(self):
+		assert list(self._sut) == [key * 2 for key in range(20)]
+		assert self._sut.loaded == 20
+
+	def test_bounded(self):
+		for i, item in enumerate(self._sut):
+			assert len(self.started) <= i + 3
+
+	def test_stats(self):
+		list(self._sut)
+		stats = self._sut.stats()
+
+		assert stats["prefetch"] == 3
+		assert stats["threads"] == 2
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import cv2
+import numpy as np
+
+from analyzer import edge_detection
+from analyzer.constants import Registration
+from analyzer.edge_detection import RegisteredEdgeFeature
+
+
+class RegistrationTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		random = np.random.RandomState(2)
+		self.image = cv2.GaussianBlur(random.randint(0, 256, (144, 256)).astype(np.uint8), (9, 9), 0)
+		self.image = cv2.normalize(self.image, None, 0, 255, cv2.NORM_MINMAX)
+
+		self.shifted = cv2.warpAffine(self.image, np.float32([[1, 0, 6], [0, 1, -3]]), (256, 144))
+
+	def test_phase(self):
+		warp_matrix = edge_detection.phase_registration(self.shifted, self.image)
+
+		assert np.allclose(warp_matrix[:, 2], [6, -3], atol=0.3)
+
+	def test_pyramid(self):
+		warp_matrix = edge_detection.pyramid_registration(self.shifted, self.image)
+
+		assert np.allclose(warp_matrix[:, 2], [6, -3], atol=0.3)
+
+	def test_skip_equal(self):
+		_, _, aligned, image = edge_detection.calculate_image_registration(self.image, self.image.copy(),
+		                                                                  Registration.phase.value)
+
+		assert np.array_equal(aligned, image)
+
+	def test_keys(self):
+		assert RegisteredEdgeFeature().key() == "edgeim"
+		assert RegisteredEdgeFeature(Registration.pyramid.value).key() == "edgeim_pyramid"
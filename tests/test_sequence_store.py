@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+import os
+import shutil
+import tempfile
+import unittest
+from os.path import join
+
+import numpy as np
+
+from analyzer import features, frame_store, shot_detection
+from analyzer.frame_source import StoredFrames, VideoStream
+from analyzer.frame_store import FrameStore
+from analyzer.sequence_store import SequenceStore
+from tests.helpers import generate_video
+
+
+class SequenceStoreTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, path)
+		self._sut = SequenceStore(join(path, "histogram.json"), {"source": "frames"})
+
+	def test_merge_adjacent(self):
+		self._sut.insert(10, [0.1, 0.2])
+		self._sut.insert(12, [0.3])
+
+		assert self._sut.ranges == [(10, [0.1, 0.2, 0.3])]
+
+	def test_replace_overlap(self):
+		self._sut.insert(10, [0.1, 0.2, 0.3, 0.4])
+		self._sut.insert(11, [0.5, 0.6])
+
+		assert self._sut.ranges == [(10, [0.1, 0.5, 0.6, 0.4])]
+
+	def test_missing(self):
+		self._sut.insert(10, [0.1, 0.2])
+		self._sut.insert(20, [0.1, 0.2])
+
+		assert self._sut.missing(5, 25) == [(5, 9), (12, 19), (22, 25)]
+		assert self._sut.missing(10, 11) == []
+
+	def test_slice(self):
+		self._sut.insert(10, [0.1, 0.2, 0.3])
+
+		assert self._sut.slice(11, 12) == [0.2, 0.3]
+		assert self._sut.slice(11, 13) is None
+
+
+class IncrementalSequenceTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, path)
+		random = np.random.RandomState(4)
+		frames = [random.randint(0, 256, size=(24, 32, 3)).astype(np.uint8) for _ in range(30)]
+
+		frame_store.write(frames, path, 25, chunk_size=8)
+		self.path = path
+		self.frames = frames
+		self.store = FrameStore(path)
+		self.feature = shot_detection.histogram_feature("histogram")
+		self._sut = SequenceStore(join(path, "histogram.json"), {"source": "frame_store"})
+
+	def test_limited_runs(self):
+		expected = features.calculate_sequence(StoredFrames(self.store), self.feature)
+
+		self._sut.calculate(StoredFrames(self.store, ("5", "12")), self.feature)
+		self._sut.calculate(StoredFrames(self.store, ("20", "25")), self.feature)
+
+		assert self._sut.missing(1, 29) == [(1, 4), (12, 19), (25, 29)]
+		assert self._sut.calculate(StoredFrames(self.store), self.feature) == expected
+
+	def test_rewritten_frames(self):
+		parameters = StoredFrames(self.store).parameters()
+
+		frame_store.write(self.frames[::-1], self.path, 25, chunk_size=8)
+		# a later write, independent of the resolution of the file system's timestamps
+		os.utime(join(self.path, frame_store.HEADER_FILENAME), ns=(0, parameters["frames"][1] + 10 ** 9))
+
+		assert StoredFrames(FrameStore(self.path)).parameters() != parameters
+
+
+class VideoSequenceTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, path)
+
+		self.src = generate_video(path, frames=30)
+		self.feature = shot_detection.histogram_feature("histogram")
+		self._sut = SequenceStore(join(path, "histogram.json"), {"source": "clip.mp4"})
+
+	def test_limit_past_the_end(self):
+		source = VideoStream(self.src, ("20", "80"), width=64)
+
+		assert len(source) == 11
+		assert len(self._sut.calculate(source, self.feature)) == 10
+
+	def test_short_source(self):
+		source = VideoStream(self.src, ("20", "30"), width=64)
+		# a length which the video doesn't have
+		source.count = source.length = 15
+
+		assert len(self._sut.calculate(source, self.feature)) == 10
+		assert self._sut.missing(20, 33) == [(30, 33)]
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+import filecmp
+import os
+import shutil
+import tempfile
+import unittest
+from os.path import join
+from unittest import mock
+
+import cv2
+
+from analyzer import splitter
+from tests.helpers import generate_video
+
+
+class SplitTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.path)
+
+		self.src = generate_video(self.path, frames=60, size=(160, 90))
+
+	def test_parallel_matches_serial(self):
+		serial, parallel = join(self.path, "serial"), join(self.path, "parallel")
+
+		splitter.split(self.src, serial)
+		splitter.split(self.src, parallel, jobs=3)
+
+		names = sorted(os.listdir(serial))
+		assert len(names) == 60
+		assert sorted(os.listdir(parallel)) == names
+		assert all(filecmp.cmp(join(serial, name), join(parallel, name), shallow=False) for name in names)
+
+	def test_quality(self):
+		default, best = join(self.path, "default"), join(self.path, "best")
+
+		splitter.split(self.src, default)
+		splitter.split(self.src, best, quality=2)
+
+		size = lambda folder: sum(os.path.getsize(join(folder, name)) for name in os.listdir(folder))
+		assert size(best) > size(default)
+
+	def test_proxies(self):
+		frames, proxies = join(self.path, "frames"), join(self.path, "proxies")
+		splitter.split(self.src, frames, proxy_dest=proxies, proxy_width=64)
+
+		names = sorted(os.listdir(frames))
+		assert len(names) == 60
+		assert sorted(os.listdir(proxies)) == names
+		assert cv2.imread(join(proxies, names[0])).shape == (36, 64, 3)
+		assert cv2.imread(join(frames, names[0])).shape == (288, 512, 3)
+
+	def test_earlier_proxies_removed(self):
+		frames, proxies = join(self.path, "frames"), join(self.path, "proxies")
+		splitter.split(self.src, frames, proxy_dest=proxies, proxy_width=64)
+		splitter.split(self.src, frames, proxy_dest=proxies)
+
+		assert len(os.listdir(frames)) == 60
+		assert os.listdir(proxies) == []
+
+	def test_missing_source_keeps_frames(self):
+		frames = join(self.path, "frames")
+		splitter.split(self.src, frames)
+
+		with self.assertRaises(Exception):
+			splitter.split(join(self.path, "missing.mp4"), frames)
+
+		assert len(os.listdir(frames)) == 60
+
+	def test_failed_split_keeps_frames(self):
+		frames = join(self.path, "frames")
+		splitter.split(self.src, frames)
+
+		with mock.patch.object(splitter, "split_frames", side_effect=RuntimeError("ffmpeg failed")):
+			with self.assertRaises(RuntimeError):
+				splitter.split(self.src, frames)
+
+		assert len(os.listdir(frames)) == 60
+		assert sorted(os.listdir(self.path)) == ["clip.mp4", "frames"]
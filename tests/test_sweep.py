@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import json
+import shutil
+import tempfile
+import unittest
+from os.path import join
+from unittest import mock
+
+import numpy as np
+
+from analyzer import edge_detection, shot_detection, sweep
+from analyzer.constants import ExtractionType
+
+
+@mock.patch("analyzer.plot.plot")
+class SweepTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.distances = np.random.RandomState(5).rand(300).tolist()
+
+	def assert_same_shots(self, extraction_type, extract_shots, threshold_values):
+		results = sweep.sweep(self.distances, 1, extraction_type, threshold_values)
+
+		for result in results:
+			shots = extract_shots(self.distances, 1, result["threshold"], None)
+			lengths = [shot.length / 25 for shot in shots]
+
+			assert result["shots"] == len(shots)
+			self.assertAlmostEqual(result["asl"], np.mean(lengths), places=3)
+			self.assertAlmostEqual(result["msl"], np.median(lengths), places=3)
+
+	def test_histogram(self, plot):
+		self.assert_same_shots(ExtractionType.histogram.value, shot_detection.extract_shots, [0.2, 0.5, 0.8, 1.1])
+
+	def test_edge(self, plot):
+		self.assert_same_shots(ExtractionType.edge.value, edge_detection.extract_shots, [0.2, 0.5, 0.8, 1.1])
+
+	def test_reference(self, plot):
+		shots = shot_detection.extract_shots(self.distances, 1, 0.5, None)
+		reference = [shot.start_index for shot in shots[1:]]
+
+		result = sweep.sweep(self.distances, 1, ExtractionType.histogram.value, [0.5], reference)[0]
+
+		assert result["precision"] == 1.0
+		assert result["recall"] == 1.0
+
+	def test_too_short(self, plot):
+		result = sweep.sweep([0.1], 1, ExtractionType.histogram.value, [0.5])[0]
+
+		assert result["shots"] == 0
+
+
+class ThresholdsTest(unittest.TestCase):
+	"""Some test case"""
+
+	def test_inclusive(self):
+		assert sweep.thresholds(0.1, 0.5, 0.1) == [0.1, 0.2, 0.3, 0.4, 0.5]
+
+	def test_empty(self):
+		assert sweep.thresholds(0.5, 0.1, 0.1) == []
+
+
+class ReferenceTest(unittest.TestCase):
+	"""Some test case"""
+
+	def setUp(self):
+		self.path = tempfile.mkdtemp()
+		self.addCleanup(shutil.rmtree, self.path)
+
+	def write(self, filename, content):
+		path = join(self.path, filename)
+		with open(path, "w") as outfile:
+			outfile.write(content)
+
+		return path
+
+	def test_json_list(self):
+		assert sweep.read_reference(self.write("cuts.json", "[10, 20]")) == [10, 20]
+
+	def test_shots(self):
+		shots = [{"startIndex": 0}, {"startIndex": 10}, {"startIndex": 20}]
+		assert sweep.read_reference(self.write("shots.json", json.dumps(shots))) == [10, 20]
+
+	def test_lines(self):
+		assert sweep.read_reference(self.write("cuts.txt", "10\n20\n\n")) == [10, 20]